@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Plays complete all-AI games through the room lifecycle in main.py against
+# fake_llm_server.py, so server throughput can be measured offline.
+#   python bench_rooms.py --rooms 20 --time-scale 0.2 --spawn-server --mean 1.5
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent all-AI rooms")
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--time-scale", type=float, default=0.2, help="Multiplier for phase durations and turn delays")
+    parser.add_argument("--timeout", type=float, default=900, help="Give up on unfinished rooms after this many seconds")
+    parser.add_argument("--llm-url", default="http://127.0.0.1:8001/chat/completions")
+    parser.add_argument("--spawn-server", action="store_true", help="Start fake_llm_server.py for the run")
+    parser.add_argument("--latency", default="lognormal")
+    parser.add_argument("--mean", type=float, default=1.5)
+    parser.add_argument("--stddev", type=float, default=0.6)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    return parser.parse_args()
+
+def spawn_fake_server(args):
+    port = args.llm_url.split(":")[-1].split("/")[0]
+    proc = subprocess.Popen([
+        sys.executable, "fake_llm_server.py",
+        "--port", port,
+        "--latency", args.latency,
+        "--mean", str(args.mean),
+        "--stddev", str(args.stddev),
+        "--error-rate", str(args.error_rate),
+    ])
+
+    import httpx
+    stats_url = args.llm_url.rsplit("/chat/completions", 1)[0] + "/stats"
+    for _ in range(50):
+        try:
+            httpx.get(stats_url, timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Fake LLM server did not start")
+
+def scale_durations(main, scale):
+    # Phase timers count down in whole seconds
+    for name in ["NIGHT_DURATION", "DISCUSSION_DURATION", "VOTING_DURATION", "REVOTE_DISCUSSION_DURATION"]:
+        setattr(main, name, max(1, round(getattr(main, name) * scale)))
+    main.AI_TURN_DELAY *= scale
+    main.HUMAN_TURN_DELAY *= scale
+
+async def monitor_loop_lag(samples, interval=0.05):
+    # How late the event loop wakes up is what every websocket in the process feels
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+async def run_room(main):
+    room_id = (await main.create_room())["room_id"]
+    game = main.rooms[room_id]['game']
+    while len(game.players) < 10:
+        await main.add_bot(room_id)
+
+    start = time.monotonic()
+    await main.start_game(room_id)
+    while not game.game_over:
+        await asyncio.sleep(0.2)
+
+    return {
+        "duration": time.monotonic() - start,
+        "rounds": game.round_number,
+        "winner": game.winner,
+        "messages": sum(len(h) for h in game.discussion_history.values())
+    }
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+async def run(args):
+    import main
+    scale_durations(main, args.time_scale)
+
+    lag = []
+    monitor = asyncio.create_task(monitor_loop_lag(lag))
+    start = time.monotonic()
+
+    tasks = [asyncio.create_task(run_room(main)) for _ in range(args.rooms)]
+    done, pending = await asyncio.wait(tasks, timeout=args.timeout)
+    for task in pending:
+        task.cancel()
+    monitor.cancel()
+
+    results = [t.result() for t in done if not t.exception()]
+    wall = time.monotonic() - start
+
+    report = [f"Rooms finished: {len(results)}/{args.rooms} in {wall:.1f}s (time scale {args.time_scale})"]
+    if results:
+        durations = [r["duration"] for r in results]
+        report.append(f"Game duration: mean {statistics.mean(durations):.1f}s, p95 {percentile(durations, 0.95):.1f}s")
+        report.append(f"Rounds per game: mean {statistics.mean(r['rounds'] for r in results):.1f}")
+        report.append(f"Messages per game: mean {statistics.mean(r['messages'] for r in results):.1f}")
+    report.append(f"Event loop lag: p50 {percentile(lag, 0.5) * 1000:.1f}ms, p99 {percentile(lag, 0.99) * 1000:.1f}ms, max {max(lag, default=0) * 1000:.1f}ms")
+
+    from llm_client import close_llm_client
+    await close_llm_client()
+
+    return report
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    os.environ["LLM_API_URL"] = args.llm_url
+
+    server = spawn_fake_server(args) if args.spawn_server else None
+    try:
+        # The game engine prints every vote and API call, keep only the report
+        logging.getLogger("player_classes").setLevel(logging.WARNING)
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = asyncio.run(run(args))
+        print("\n".join(report))
+    finally:
+        if server:
+            server.terminate()
@@ -0,0 +1,77 @@
+import sys
+import time
+import argparse
+import contextlib
+import io
+import numpy as np
+from model_manager import ModelManager
+
+# Compares the int8 policies against the float ones on recorded observations
+# before MAFIA_MODEL_QUANTIZED=1 is turned on.
+#   python check_quantized.py exported_policies/ --episodes 50 --save observations.npz
+#   python check_quantized.py exported_policies/ --observations observations.npz
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check argmax agreement of quantized policies")
+    parser.add_argument("model_path", help="export_policies.py directory (exported with --quantize) or RLlib checkpoint")
+    parser.add_argument("--observations", help=".npz with obs and roles arrays, recorded by --save")
+    parser.add_argument("--episodes", type=int, default=50, help="Games to record when no observations are given")
+    parser.add_argument("--save", help="Write the recorded observations here")
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    return parser.parse_args()
+
+def record_observations(model, episodes):
+    # Plays MafiaEnv games with the float policies and keeps every live agent's observation
+    from train import MafiaEnv
+    env = MafiaEnv()
+    observations, roles = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(episodes):
+            obs, _ = env.reset()
+            done = {"__all__": False}
+            while not done["__all__"]:
+                names = [name for name, o in obs.items() if o.any()]
+                agent_roles = [env.game.players[env.game.state.index[name]].role for name in names]
+                actions = model.get_actions([obs[name] for name in names], agent_roles)
+                observations.extend(obs[name] for name in names)
+                roles.extend(agent_roles)
+                obs, _, done, _, _ = env.step(dict(zip(names, actions)))
+    return np.array(observations, dtype=np.float32), np.array(roles)
+
+def time_inference(model, observations, roles, repeats=20):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.get_actions(observations, roles)
+    return (time.perf_counter() - start) / repeats
+
+if __name__ == "__main__":
+    args = parse_args()
+    float_model = ModelManager(args.model_path)
+    int8_model = ModelManager(args.model_path, quantized=True)
+
+    if args.observations:
+        data = np.load(args.observations)
+        observations, roles = data["obs"], data["roles"]
+    else:
+        observations, roles = record_observations(float_model, args.episodes)
+    if args.save:
+        np.savez_compressed(args.save, obs=observations, roles=roles)
+
+    obs_list, role_list = list(observations), [str(r) for r in roles]
+    float_actions = np.array(float_model.get_actions(obs_list, role_list))
+    int8_actions = np.array(int8_model.get_actions(obs_list, role_list))
+    agree = float_actions == int8_actions
+
+    print(f"Observations: {len(obs_list)}")
+    for role in sorted(set(role_list)):
+        mask = np.array(role_list) == role
+        print(f"  {role}: {agree[mask].mean():.4f} agreement over {mask.sum()}")
+    overall = agree.mean() if len(agree) else 1.0
+    print(f"Overall agreement: {overall:.4f} (minimum {args.min_agreement})")
+
+    float_time = time_inference(float_model, obs_list, role_list)
+    int8_time = time_inference(int8_model, obs_list, role_list)
+    print(f"Batch latency: float {float_time * 1000:.2f}ms, int8 {int8_time * 1000:.2f}ms")
+
+    sys.exit(0 if overall >= args.min_agreement else 1)
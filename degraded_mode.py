@@ -0,0 +1,83 @@
+import os
+import time
+from collections import deque
+
+# "auto" switches on load, "on" and "off" force the mode
+DEGRADED_MODE = os.getenv("LLM_DEGRADED_MODE", "auto")
+DEGRADE_QUEUE_DEPTH = int(os.getenv("LLM_DEGRADE_QUEUE_DEPTH", 20)) # Calls waiting on the scheduler
+LATENCY_SLO = float(os.getenv("LLM_LATENCY_SLO", 8)) # Seconds, p95 of recent calls
+LATENCY_WINDOW = 60 # Seconds of latency samples considered
+LATENCY_MIN_SAMPLES = 5
+RECOVER_RATIO = 0.5 # Signals must drop below this fraction of their thresholds to recover
+MIN_DEGRADED_TIME = 15 # Seconds spent degraded before recovery is considered
+
+
+class DegradedMode:
+    # Decides when AI players should stop calling the LLM and fall back to the
+    # local heuristics. Entering and leaving use different thresholds so the
+    # mode does not flap while the backend is hovering around the limit.
+    def __init__(self, scheduler, router, mode=DEGRADED_MODE, queue_depth=DEGRADE_QUEUE_DEPTH, latency_slo=LATENCY_SLO):
+        self.scheduler = scheduler
+        self.router = router
+        self.mode = mode
+        self.queue_threshold = queue_depth
+        self.latency_slo = latency_slo
+        self.latencies = deque() # (timestamp, seconds)
+        self.degraded = False
+        self.changed_at = time.monotonic()
+        self.reason = None
+        self.activations = 0
+
+    def observe(self, latency):
+        # Called after every LLM call, failed and cancelled ones included, with the time spent on the backend
+        self.latencies.append((time.monotonic(), latency))
+
+    def latency_p95(self):
+        cutoff = time.monotonic() - LATENCY_WINDOW
+        while self.latencies and self.latencies[0][0] < cutoff:
+            self.latencies.popleft()
+        if len(self.latencies) < LATENCY_MIN_SAMPLES:
+            return None
+        ordered = sorted(l for _, l in self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def _overload_reason(self, ratio):
+        if not any(b.breaker.allow() for b in self.router.backends):
+            return "all backends unavailable"
+        if self.scheduler.queue_depth() >= self.queue_threshold * ratio:
+            return "queue depth"
+        p95 = self.latency_p95()
+        if p95 is not None and p95 >= self.latency_slo * ratio:
+            return "latency"
+        return None
+
+    def active(self):
+        if self.mode == "on":
+            return True
+        if self.mode == "off":
+            return False
+
+        now = time.monotonic()
+        if not self.degraded:
+            reason = self._overload_reason(1.0)
+            if reason:
+                self.degraded = True
+                self.changed_at = now
+                self.reason = reason
+                self.activations += 1
+        elif now - self.changed_at >= MIN_DEGRADED_TIME and self._overload_reason(RECOVER_RATIO) is None:
+            self.degraded = False
+            self.changed_at = now
+            self.reason = None
+
+        return self.degraded
+
+    def stats(self):
+        # Read-only, only the AI players' active() calls move the mode
+        return {
+            "mode": self.mode,
+            "degraded": self.degraded if self.mode == "auto" else self.mode == "on",
+            "reason": self.reason,
+            "activations": self.activations,
+            "latency_p95": self.latency_p95()
+        }
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import argparse
+import torch
+from model_manager import load_checkpoint_modules, quantize_module, POLICY_IDS, EXPORT_MANIFEST
+
+# Exports each role policy of an RLlib PPO checkpoint to TorchScript, so the
+# game can load them with ModelManager without starting Ray.
+#   python export_policies.py <checkpoint_path> exported_policies/ [--quantize]
+
+
+class PolicyForward(torch.nn.Module):
+    # Plain tensor in, action logits out, which is what torch.jit.trace needs
+    def __init__(self, module):
+        super().__init__()
+        self.module = module
+
+    def forward(self, obs):
+        return self.module.forward_inference({"obs": obs})["action_dist_inputs"]
+
+
+def trace_policy(module, example):
+    wrapper = PolicyForward(module).eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(wrapper, example, check_trace=False)
+        # The traced graph has to agree with the module it came from
+        if not torch.allclose(traced(example), wrapper(example), atol=1e-5):
+            raise RuntimeError("Exported policy does not match the module it was traced from")
+    return traced
+
+
+def export_policies(checkpoint_path, out_dir, quantize=False):
+    os.makedirs(out_dir, exist_ok=True)
+    modules = load_checkpoint_modules(checkpoint_path)
+
+    obs_dim = modules["Villager"].observation_space.shape[0]
+    example = torch.zeros((2, obs_dim), dtype=torch.float32)
+
+    manifest = {"obs_dim": obs_dim, "checkpoint": os.path.abspath(checkpoint_path), "policies": {}}
+    for policy_id in POLICY_IDS:
+        module = modules[policy_id].eval()
+        info = {"file": f"{policy_id}.pt", "num_actions": int(module.action_space.n)}
+        trace_policy(module, example).save(os.path.join(out_dir, info["file"]))
+
+        if quantize:
+            info["int8_file"] = f"{policy_id}.int8.pt"
+            trace_policy(quantize_module(module), example).save(os.path.join(out_dir, info["int8_file"]))
+
+        manifest["policies"][policy_id] = info
+        print(f"Exported {policy_id} policy to {out_dir}")
+
+    with open(os.path.join(out_dir, EXPORT_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export RLlib policies for Ray-free inference")
+    parser.add_argument("checkpoint_path")
+    parser.add_argument("out_dir", nargs="?", default="exported_policies")
+    parser.add_argument("--quantize", action="store_true", help="Also export int8 dynamically quantized policies")
+    args = parser.parse_args()
+
+    export_policies(args.checkpoint_path, args.out_dir, args.quantize)
+    import ray
+    ray.shutdown()
+    sys.exit(0)
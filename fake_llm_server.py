@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from prompts import SUSPICION_INSTRUCTIONS
+
+# Stand-in for the chat/completions backend so games can be played and
+# benchmarked offline. Run with:
+#   python fake_llm_server.py --port 8001 --latency lognormal --mean 1.5
+# and start the game server with LLM_API_URL=http://127.0.0.1:8001/chat/completions
+
+CANNED_ARGUMENTS = [
+    "{name} has been very quiet, which makes me wonder what they are hiding.",
+    "I don't trust how quickly {name} agreed with everyone last round.",
+    "Let's not rush. {name} seems defensive, but that alone proves nothing.",
+    "{name} keeps changing the subject whenever the night kills come up.",
+    "I think we should look closer at {name} before we vote.",
+    "My gut says {name} is not telling us everything.",
+    "I have nothing solid yet, but {name} is acting odd.",
+]
+
+
+class FakeLLMConfig:
+    def __init__(self, latency="lognormal", mean=1.5, stddev=0.6, error_rate=0.0, chunk_delay=0.05):
+        self.latency = latency # fixed, uniform or lognormal
+        self.mean = mean
+        self.stddev = stddev
+        self.error_rate = error_rate
+        self.chunk_delay = chunk_delay
+
+    def sample_latency(self):
+        if self.latency == "fixed":
+            return self.mean
+        if self.latency == "uniform":
+            return random.uniform(max(0.0, self.mean - self.stddev), self.mean + self.stddev)
+        # Lognormal with the requested mean and standard deviation, long right tail like a real provider
+        if self.mean <= 0:
+            return 0.0
+        sigma2 = math.log(1 + (self.stddev / self.mean) ** 2)
+        mu = math.log(self.mean) - sigma2 / 2
+        return random.lognormvariate(mu, sigma2 ** 0.5)
+
+
+config = FakeLLMConfig()
+app = FastAPI()
+stats = {"requests": 0, "errors": 0, "started": time.time()}
+
+
+def field(context, key):
+    # Pull "Key:value" out of the compact context strings built by AI_Player
+    match = re.search(rf"{key}:([^ ]*)", context)
+    return match.group(1) if match else ""
+
+def fake_completion(messages):
+    system = [m.get("content", "") for m in messages if m.get("role") == "system"]
+    context = next((m.get("content", "") for m in messages if m.get("role") == "user"), "")
+    me = field(context, "Name")
+    alive = [n for n in field(context, "Alive").split(",") if n and n != me]
+
+    if SUSPICION_INSTRUCTIONS in system:
+        # Keep confirmed scores (investigation results) and jitter the rest
+        scores = {}
+        for entry in field(context, "Scores").split(";"):
+            if ":" in entry:
+                name, score = entry.split(":", 1)
+                scores[name] = float(score)
+        return json.dumps({
+            name: scores.get(name) if abs(scores.get(name, 0.0)) == 1.0 else round(random.uniform(-0.5, 0.5), 1)
+            for name in alive
+        })
+
+    return random.choice(CANNED_ARGUMENTS).format(name=random.choice(alive) if alive else "someone")
+
+def completion_body(text, messages):
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+    completion_tokens = max(1, len(text) // 4)
+    return {
+        "id": f"fake-{stats['requests']}",
+        "object": "chat.completion",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+@app.post("/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    stats["requests"] += 1
+
+    await asyncio.sleep(config.sample_latency())
+
+    if random.random() < config.error_rate:
+        stats["errors"] += 1
+        return JSONResponse(status_code=random.choice([429, 500, 503]), content={"error": "injected failure"})
+
+    text = fake_completion(messages)
+    response = completion_body(text, messages)
+
+    if not body.get("stream"):
+        return response
+
+    async def events():
+        for i, word in enumerate(text.split(" ")):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(config.chunk_delay)
+        yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}], 'usage': response['usage']})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "uptime": time.time() - stats["started"]}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible completion server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--mean", type=float, default=1.5, help="Mean latency in seconds")
+    parser.add_argument("--stddev", type=float, default=0.6, help="Latency spread in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--chunk-delay", type=float, default=0.05, help="Delay between streamed chunks")
+    args = parser.parse_args()
+
+    config.latency = args.latency
+    config.mean = args.mean
+    config.stddev = args.stddev
+    config.error_rate = args.error_rate
+    config.chunk_delay = args.chunk_delay
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
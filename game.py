@@ -1,13 +1,22 @@
+import os
 import random
 from player_classes import AI_Player, Human_Player
-from model_manager import ModelManager, ObservationManager
+from model_manager import get_model, ObservationManager
 from phase_manager import PhaseManager
 from web_app_function_manager import WebAppFunctionManager
+from round_context import RoundContext
+from memory import MemoryModel, MemoryBus
+from game_state import GameState
+from inference_service import get_inference_service
+
+# Weight kept per write by events evicted from full memories, unset keeps only held events in the idf
+MEMORY_DECAY = float(os.getenv("MAFIA_MEMORY_DECAY")) if os.getenv("MAFIA_MEMORY_DECAY") else None
 
 
 class Game_Manager:
     def __init__(self, use_model=False):
         self.players = []
+        self.state = GameState() # Array view of players for observations and masks
         self.round_number = 1
         self.last_deaths = []
         self.discussion_history = {1: [("System", "Start of game - round 1.")]}
@@ -18,6 +27,7 @@ class Game_Manager:
         self.revote = []
         self.is_night = True
         self.votes = {}
+        self.vote_history = [] # (round, voter name, target name) for every vote cast
         self.current_speaker = None
         self.sub_phase = None
         self.phase_timer = None
@@ -25,28 +35,60 @@ class Game_Manager:
         self.last_voted_out = None
         self.game_over = False
         self.winner = None
+        self.room_id = None # Set by the web server, labels this game's LLM usage
 
         self.use_model = use_model
         if use_model:
-            model_path = "/Users/qiaoe27/ray_results/PPO_2025-06-21_12-05-28/PPO_mafia_8cc60_00000_0_2025-06-21_12-05-28/checkpoint_000002"
-            self.model = ModelManager(model_path)
+            # An export_policies.py directory loads without Ray, a raw checkpoint still works
+            model_path = os.getenv("MAFIA_MODEL_PATH", "/Users/qiaoe27/ray_results/PPO_2025-06-21_12-05-28/PPO_mafia_8cc60_00000_0_2025-06-21_12-05-28/checkpoint_000002")
+            quantized = os.getenv("MAFIA_MODEL_QUANTIZED") == "1"
+            self.model = get_model(model_path, quantized) # Shared with every other room using this model
 
         # Component managers
         self.observation_manager = ObservationManager(self)
         self.phase_manager = PhaseManager(self)
         self.web_app_manager = WebAppFunctionManager(self)
+        self.round_context = RoundContext(self)
+        # Vocabulary and idf shared by every AI player's memory
+        self.memory_model = MemoryModel(embed_dim=32, decay=MEMORY_DECAY)
+        # Public events are published once to every AI player's memory
+        self.memory_bus = MemoryBus(self.memory_model)
 
     def add_player(self, player):
         self.players.append(player)
+        if isinstance(player, AI_Player):
+            self.memory_bus.subscribe(player.name, player.memory)
+        self.state.rebuild(self.players, self.already_investigated)
+
+    def remove_player(self, player_name):
+        self.players = [p for p in self.players if p.name != player_name]
+        self.memory_bus.unsubscribe(player_name)
+        self.state.rebuild(self.players, self.already_investigated)
+
+    def assign_role(self, player, role):
+        player.role = role
+        self.state.set_role(player.name, role)
+
+    def eliminate(self, player):
+        player.is_alive = False
+        self.state.set_alive(player.name, False)
+
+    def mark_investigated(self, player):
+        self.already_investigated.add(player)
+        self.state.set_investigated(player.name)
 
     def get_alive_players(self):
         return [p for p in self.players if p.is_alive]
+
+    def publish_events(self, events):
+        # Writes public events to the memory of every alive AI player in one batch
+        self.memory_bus.publish_many(events, [p.name for p in self.players if p.is_alive])
     
     def shuffle_roles(self):
         roles = ["Villager"] * 5 + ["Mafia"] * 2 + ["Doctor"] + ["Investigator"] + ["Villager"]
         random.shuffle(roles)
         for player, role in zip(self.players, roles):
-            player.role = role
+            self.assign_role(player, role)
 
     def start_game(self):
         self.shuffle_roles()
@@ -109,8 +151,35 @@ class Game_Manager:
     def voting_phase(self):
         self.phase_manager.voting_phase()
     
+    def get_round_context(self):
+        # Shared prompt pieces for this round, brought up to date on access
+        return self.round_context.refresh()
+
     def get_observation(self, player):
         return self.observation_manager.get_observation(player)
+
+    def get_model_actions(self, players):
+        # Policy actions for several AI players with one forward pass per role
+        if not self.use_model:
+            return {}
+        players = [p for p in players if isinstance(p, AI_Player)]
+        if not players:
+            return {}
+        observations = [self.get_observation(p) for p in players]
+        actions = self.model.get_actions(observations, [p.role for p in players])
+        return {p.name: action for p, action in zip(players, actions)}
+
+    async def get_model_actions_async(self, players):
+        # Same as get_model_actions, but the forward pass runs on the inference
+        # thread, batched with requests from other rooms
+        if not self.use_model:
+            return {}
+        players = [p for p in players if isinstance(p, AI_Player)]
+        if not players:
+            return {}
+        observations = [self.get_observation(p) for p in players]
+        actions = await get_inference_service(self.model).get_actions(observations, [p.role for p in players])
+        return {p.name: action for p, action in zip(players, actions)}
     
     def doctor_action(self, player_name, target_name):
         return self.web_app_manager.doctor_action(player_name, target_name)
@@ -124,8 +193,8 @@ class Game_Manager:
     def vote_action(self, player_name, target_name):
         return self.web_app_manager.vote_action(player_name, target_name)
     
-    def try_advance(self):
-        return self.web_app_manager.try_advance()
+    def try_advance(self, model_actions=None):
+        return self.web_app_manager.try_advance(model_actions)
     
     def get_player_role(self, player_name):
         return self.web_app_manager.get_player_role(player_name)
@@ -0,0 +1,55 @@
+import numpy as np
+
+ROLES = ['Villager', 'Mafia', 'Doctor', 'Investigator']
+ROLE_INDEX = {role: i for i, role in enumerate(ROLES)}
+MAFIA = ROLE_INDEX['Mafia']
+
+
+class GameState:
+    # Array copy of the per-player facts observations and masks are built
+    # from, in game.players order. Game_Manager keeps it in step through its
+    # mutators (add/remove player, roles, eliminate, mark_investigated).
+    def __init__(self):
+        self.names = []
+        self.index = {} # name -> position in game.players
+        self.alive = np.zeros(0, dtype=np.float32)
+        self.role_idx = np.zeros(0, dtype=np.int8)
+        self.investigated = np.zeros(0, dtype=bool)
+        self.version = 0 # Bumped on every change
+
+    def rebuild(self, players, already_investigated=()):
+        self.names = [p.name for p in players]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.alive = np.array([1.0 if p.is_alive else 0.0 for p in players], dtype=np.float32)
+        self.role_idx = np.array([ROLE_INDEX[p.role] for p in players], dtype=np.int8)
+        self.investigated = np.array([p in already_investigated for p in players], dtype=bool)
+        self.version += 1
+
+    def set_role(self, name, role):
+        self.role_idx[self.index[name]] = ROLE_INDEX[role]
+        self.version += 1
+
+    def set_alive(self, name, is_alive):
+        self.alive[self.index[name]] = 1.0 if is_alive else 0.0
+        self.version += 1
+
+    def set_investigated(self, name):
+        self.investigated[self.index[name]] = True
+        self.version += 1
+
+    def action_mask(self, name, role, night):
+        # Same rules as the old per-player loops: alive targets other than
+        # yourself, Mafia skip their team, Investigators prefer unseen players
+        if night and role not in ("Mafia", "Doctor", "Investigator"):
+            # Villager has no actions at night
+            return np.zeros(len(self.names), dtype=np.float32)
+
+        others = self.alive.copy()
+        others[self.index[name]] = 0.0
+        if night and role == "Mafia":
+            return others * (self.role_idx != MAFIA)
+        if night and role == "Investigator":
+            unseen = others * ~self.investigated
+            # If no targets that haven't been investigated, allow all alive players
+            return unseen if unseen.any() else others
+        return others
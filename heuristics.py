@@ -0,0 +1,183 @@
+import re
+import random
+from prompts import ARGUMENT_TEMPLATES
+
+# Suspicion changes applied per event, scores stay within (-MAX_SCORE, MAX_SCORE)
+# so only investigations can make a player certain
+ACCUSED_DELTA = 0.1
+DEFENDED_DELTA = -0.05
+ACCUSED_ME_DELTA = 0.15
+VICTIM_ACCUSED_DELTA = 0.2
+VOTED_MAFIA_DELTA = -0.25
+VOTED_INNOCENT_DELTA = 0.25
+DEFENDED_MAFIA_DELTA = 0.3
+MAX_SCORE = 0.9
+
+ACCUSE_WORDS = re.compile(r"\b(suspicious|sus|mafia|lying|liar|vote|voting|accuse|guilty|shady|hiding|quiet)\b", re.I)
+DEFEND_WORDS = re.compile(r"\b(trust|innocent|defend|clear|believe)\b", re.I)
+# Negations flip a cue, so they are checked before the plain words above
+NEGATED_ACCUSE = re.compile(r"\b(not|isn't|aren't|(don't|do not) think \w+ is) (a |the )?(mafia|suspicious|sus|guilty|lying|liar|problem)\b", re.I)
+NEGATED_DEFEND = re.compile(r"\b(not on our side|not innocent|(don't|do not|can't|cannot|wouldn't) trust)\b", re.I)
+DEATHS_PATTERN = re.compile(r"died during the night: (.+)\.$")
+VOTED_OUT_PATTERN = re.compile(r"^(.+) was voted out by the town\. .+ was (a Mafia|not a Mafia)\.$")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+class HeuristicTracker:
+    # Rule-based stand-in for the suspicion prompt, used while the LLM is
+    # degraded. Reads only the discussion lines and votes added since the last
+    # update, so each call costs the new events rather than the whole game.
+    def __init__(self):
+        self.history_seen = {} # round -> lines already processed
+        self.accused = {} # speaker -> names they accused
+        self.defended = {} # speaker -> names they defended
+
+    def update(self, player, game_manager):
+        names = [p.name for p in game_manager.players]
+        scores = dict(player.suspicions)
+
+        for round_num, history in game_manager.discussion_history.items():
+            start = self.history_seen.get(round_num, 0)
+            for speaker, line in history[start:]:
+                if speaker == "System":
+                    self._on_system(player, game_manager, round_num, line, scores)
+                else:
+                    self._on_message(player, speaker, line, names, scores)
+            self.history_seen[round_num] = len(history)
+
+        # Investigation results are facts, they override anything above
+        for investigator, name, is_mafia in game_manager.last_investigated:
+            if investigator is player:
+                scores[name] = 1.0 if is_mafia else -1.0
+
+        return scores
+
+    def _on_message(self, player, speaker, line, names, scores):
+        for sentence in SENTENCE_SPLIT.split(line):
+            mentioned = [n for n in names if n != speaker and re.search(rf"\b{re.escape(n)}\b", sentence, re.I)]
+            if not mentioned:
+                continue
+            accusing, defending = _classify(sentence)
+
+            for name in mentioned:
+                if accusing:
+                    self.accused.setdefault(speaker, set()).add(name)
+                    if name == player.name and player.role != "Mafia":
+                        # I know I'm innocent, so whoever accuses me is wrong or lying
+                        _adjust(scores, speaker, ACCUSED_ME_DELTA)
+                    else:
+                        _adjust(scores, name, ACCUSED_DELTA)
+                elif defending:
+                    self.defended.setdefault(speaker, set()).add(name)
+                    _adjust(scores, name, DEFENDED_DELTA)
+
+    def _on_system(self, player, game_manager, round_num, line, scores):
+        deaths = DEATHS_PATTERN.search(line)
+        if deaths:
+            # The Mafia tend to kill whoever was onto them
+            for victim in deaths.group(1).split(", "):
+                for name in self.accused.get(victim, ()):
+                    _adjust(scores, name, VICTIM_ACCUSED_DELTA)
+            return
+
+        voted_out = VOTED_OUT_PATTERN.search(line)
+        if voted_out:
+            name = voted_out.group(1)
+            was_mafia = voted_out.group(2) == "a Mafia"
+            for vote_round, voter, target in game_manager.vote_history:
+                if vote_round == round_num and target == name:
+                    _adjust(scores, voter, VOTED_MAFIA_DELTA if was_mafia else VOTED_INNOCENT_DELTA)
+            if was_mafia:
+                for speaker, defended in self.defended.items():
+                    if name in defended:
+                        _adjust(scores, speaker, DEFENDED_MAFIA_DELTA)
+
+
+def _classify(sentence):
+    # (accusing, defending) for one sentence
+    if NEGATED_DEFEND.search(sentence):
+        return True, False
+    if NEGATED_ACCUSE.search(sentence):
+        return False, True
+    accusing = ACCUSE_WORDS.search(sentence) is not None
+    return accusing, DEFEND_WORDS.search(sentence) is not None and not accusing
+
+
+def _adjust(scores, name, delta):
+    score = scores.get(name)
+    if score is None or abs(score) >= 1.0:
+        # Unknown or dead player, or a score an investigation already settled
+        return
+    scores[name] = max(-MAX_SCORE, min(MAX_SCORE, score + delta))
+
+
+def template_argument(player, game_manager):
+    ctx = game_manager.get_round_context()
+    alive = [n for n in ctx.alive_names if n != player.name]
+    if not alive:
+        return random.choice(ARGUMENT_TEMPLATES["neutral"])
+
+    if player.role == "Mafia":
+        # Push suspicion onto the most suspected player outside the team
+        candidates = [n for n in alive if n not in ctx.mafia_names]
+    else:
+        candidates = alive
+    ranked = sorted(candidates, key=lambda n: player.suspicions.get(n, 0.0), reverse=True)
+
+    investigated = ctx.investigated_by.get(player.name) if player.role == "Investigator" else None
+    if investigated and investigated[0] in alive:
+        name, is_mafia = investigated
+        kind = "investigated_mafia" if is_mafia else "investigated_innocent"
+    elif ranked and player.suspicions.get(ranked[0], 0.0) > 0.2:
+        name, kind = ranked[0], "accuse"
+    elif ranked and player.suspicions.get(ranked[-1], 0.0) < -0.2:
+        name, kind = ranked[-1], "defend"
+    else:
+        name, kind = random.choice(candidates or alive), "neutral"
+
+    # Avoid repeating a line someone already said this round
+    said = {line for _, line in game_manager.discussion_history.get(game_manager.round_number, [])}
+    options = [t.format(name=name) for t in ARGUMENT_TEMPLATES[kind]]
+    fresh = [o for o in options if o not in said]
+    return random.choice(fresh or options)
+
+
+if __name__ == "__main__":
+    # Checks how single lines move a Villager's suspicion of the player named
+    from types import SimpleNamespace
+
+    CHECKS = [
+        ("Bob is suspicious.", ACCUSED_DELTA),
+        ("Bob is Mafia, vote him out.", ACCUSED_DELTA),
+        ("Bob is not mafia.", DEFENDED_DELTA),
+        ("I don't think Bob is suspicious at all.", DEFENDED_DELTA),
+        ("Bob isn't the problem here.", DEFENDED_DELTA),
+        ("I trust Bob.", DEFENDED_DELTA),
+        ("I don't trust Bob.", ACCUSED_DELTA),
+        ("Trust me on this one, Bob is not on our side.", ACCUSED_DELTA),
+        ("I have good reason to believe Bob is Mafia. Please vote with me on this.", ACCUSED_DELTA),
+        ("I'm confident Bob is innocent. Let's not turn on them.", DEFENDED_DELTA),
+        ("Bob said hello.", 0.0)
+    ]
+    # Canned arguments may go unscored, but never in the wrong direction
+    DIRECTION = {"accuse": 1, "investigated_mafia": 1, "defend": -1, "investigated_innocent": -1, "neutral": 0}
+
+    def delta(line):
+        scores = {"Bob": 0.0, "Carl": 0.0, "Alice": 0.0}
+        HeuristicTracker()._on_message(SimpleNamespace(name="Carl", role="Villager"), "Alice", line, list(scores), scores)
+        return scores["Bob"]
+
+    failed = 0
+    for line, expected in CHECKS:
+        got = delta(line)
+        ok = abs(got - expected) < 1e-9
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {got:+.2f} (want {expected:+.2f}) {line}")
+    for kind, templates in ARGUMENT_TEMPLATES.items():
+        for template in templates:
+            line = template.format(name="Bob")
+            got = delta(line)
+            ok = got * DIRECTION[kind] >= 0 and (DIRECTION[kind] or got == 0)
+            failed += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {got:+.2f} ({kind}) {line}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,118 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_WINDOW = float(os.getenv("INFERENCE_BATCH_WINDOW", 0.005)) # Seconds to wait for more requests
+MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", 256)) # Observations per forward pass
+
+
+class InferenceService:
+    # Runs policy inference on a dedicated thread so torch never blocks the
+    # event loop. Requests that arrive within BATCH_WINDOW of each other, from
+    # any room, are merged into one ModelManager.get_actions call.
+    def __init__(self, model, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.model = model
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._requests = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="policy-inference", daemon=True)
+        self._thread.start()
+
+        self.batches = 0
+        self.requests = 0
+        self.observations = 0
+
+    async def get_actions(self, observations, roles):
+        if not observations:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._requests.put((observations, roles, loop, future))
+        return await future
+
+    def _collect(self):
+        batch = [self._requests.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.batch_window
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self):
+        # The only worker for this model, so nothing may end the loop
+        while True:
+            try:
+                self._serve(self._collect())
+            except Exception:
+                logger.exception("Policy inference batch failed")
+
+    def _serve(self, batch):
+        observations = [obs for request in batch for obs in request[0]]
+        roles = [role for request in batch for role in request[1]]
+
+        try:
+            actions = self.model.get_actions(observations, roles)
+            error = None
+        except Exception as e:
+            actions, error = None, e
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.observations += len(observations)
+
+        start = 0
+        for request_obs, _, loop, future in batch:
+            if error is None:
+                result, request_error = actions[start:start + len(request_obs)], None
+            else:
+                result, request_error = None, error
+            start += len(request_obs)
+            try:
+                loop.call_soon_threadsafe(_resolve, future, result, request_error)
+            except RuntimeError:
+                # The caller's loop closed, nobody is waiting for this result
+                pass
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "observations": self.observations,
+            "avg_batch": self.observations / self.batches if self.batches else 0.0
+        }
+
+
+def _resolve(future, result, error):
+    # Runs on the requesting loop, the caller may have given up already
+    if future.done():
+        return
+    if error is None:
+        future.set_result(result)
+    else:
+        future.set_exception(error)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_inference_service(model):
+    # One service thread per loaded model, shared by every room using it
+    with _services_lock:
+        service = _services.get(id(model))
+        if service is None:
+            service = InferenceService(model)
+            _services[id(model)] = service
+        return service
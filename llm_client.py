@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import logging
+import httpx
+from llm_scheduler import LLMScheduler, PRIORITY_DISCUSSION
+from llm_router import LLMRouter, backends_from_env
+from token_metrics import get_token_aggregator
+from degraded_mode import DegradedMode
+from dotenv import load_dotenv
+
+# API_KEY1..API_KEY4, OPENAI_API_KEY and the LLM_* settings may live in .env,
+# exported variables take precedence
+load_dotenv()
+
+# Point LLM_API_URL at fake_llm_server.py to run games offline
+API_URL = os.getenv("LLM_API_URL", "https://ai.hackclub.com/chat/completions")
+API_TIMEOUT = float(os.getenv("LLM_API_TIMEOUT", 30))
+HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER")) if os.getenv("LLM_HEDGE_AFTER") else None
+FALLBACK_RESPONSE = "I need to think about the situation."
+
+# httpx logs every request at INFO, which would double up with our own API log lines
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class LLMClient:
+    def __init__(self, api_url=API_URL, timeout=API_TIMEOUT, max_connections=32, max_keepalive=16, scheduler=None, router=None):
+        self.api_url = api_url
+        self.timeout = timeout
+        # Process-wide rate limits shared by every room
+        self.scheduler = scheduler if scheduler is not None else LLMScheduler()
+        # Spreads calls over every configured endpoint/key
+        self.router = router if router is not None else LLMRouter(backends_from_env(api_url), hedge_after=HEDGE_AFTER)
+        # Tells AI players when to skip the LLM and use local heuristics
+        self.degraded = DegradedMode(self.scheduler, self.router)
+        # Keep-alive pool shared by every room in the process
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._client = None
+
+    def _get_client(self):
+        # Created lazily so the pool binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={"Content-Type": "application/json"},
+                limits=self.limits,
+                timeout=self.timeout
+            )
+        return self._client
+
+    @staticmethod
+    def estimate_tokens(messages, max_tokens):
+        return sum(len(m.get("content", "")) for m in messages) // 4 + max_tokens
+
+    def _record_usage(self, messages, estimated_tokens, response_content, usage, tags):
+        aggregator = get_token_aggregator()
+        aggregator.record_response(messages, response_content, usage, **(tags or {}))
+        if usage and "total_tokens" in usage:
+            self.scheduler.reconcile(estimated_tokens, usage["total_tokens"])
+
+    async def chat(self, messages, max_tokens=32, priority=PRIORITY_DISCUSSION, tags=None):
+        # tags (room_id, role, call_type) label the call in the token metrics
+        payload = {
+            "messages": messages,
+            "max_tokens": max_tokens,
+        }
+
+        estimated_tokens = self.estimate_tokens(messages, max_tokens)
+        await self.scheduler.acquire(priority, estimated_tokens)
+        start = time.monotonic()
+        try:
+            data = await self.router.complete(
+                self._get_client(), payload,
+                # Hedged and failover requests spend budget and tokens too
+                acquire=lambda: self.scheduler.acquire(priority, estimated_tokens),
+                on_extra_usage=lambda usage: self._record_usage(messages, estimated_tokens, "", usage, tags)
+            )
+        finally:
+            # Cancelled calls included, those hit by a deadline are the slowest ones
+            self.degraded.observe(time.monotonic() - start)
+
+        response_content = data["choices"][0]["message"]["content"].strip()
+        self._record_usage(messages, estimated_tokens, response_content, data.get("usage"), tags)
+        return response_content
+
+    async def stream_chat(self, messages, on_delta, max_tokens=32, priority=PRIORITY_DISCUSSION, tags=None):
+        # Consumes the backend's server-sent-event stream, calling on_delta with
+        # the text received so far after every chunk
+        payload = {
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+
+        estimated_tokens = self.estimate_tokens(messages, max_tokens)
+        await self.scheduler.acquire(priority, estimated_tokens)
+
+        start = time.monotonic()
+        try:
+            text, usage = await self._read_stream(
+                payload, on_delta,
+                acquire=lambda: self.scheduler.acquire(priority, estimated_tokens),
+                on_extra_usage=lambda usage: self._record_usage(messages, estimated_tokens, "", usage, tags)
+            )
+        finally:
+            self.degraded.observe(time.monotonic() - start)
+
+        self._record_usage(messages, estimated_tokens, text, usage, tags)
+        return text
+
+    async def _read_stream(self, payload, on_delta, acquire=None, on_extra_usage=None):
+        text = ""
+        usage = None
+        async with self.router.stream(self._get_client(), payload, acquire, on_extra_usage) as stream:
+            # Backends without streaming support just answer with a normal completion
+            if stream.body is not None:
+                data = json.loads(stream.body)
+                text = data["choices"][0]["message"]["content"].strip()
+                await on_delta(text)
+                return text, data.get("usage")
+
+            async for line in stream.lines():
+                if not line.startswith("data:"):
+                    continue
+                chunk = line[len("data:"):].strip()
+                if chunk == "[DONE]":
+                    break
+
+                event = json.loads(chunk)
+                # Some backends report usage on the final chunk
+                usage = event.get("usage") or usage
+                if not event.get("choices"):
+                    continue
+                delta = event["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    text += delta
+                    await on_delta(text.lstrip())
+
+        return text.strip(), usage
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+_llm_client = None
+
+def get_llm_client():
+    # One client per process so connections are reused across rooms
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient()
+    return _llm_client
+
+async def close_llm_client():
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.aclose()
+        _llm_client = None
@@ -0,0 +1,348 @@
+import os
+import json
+import time
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager, AsyncExitStack
+
+GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_MODEL = "gpt-4o-mini"
+
+HEDGE_MIN_SAMPLES = 20 # Latencies needed before a backend's p95 is trusted
+FAILURE_THRESHOLD = 5 # Consecutive failures that open a breaker
+RESET_TIMEOUT = 30 # Seconds an open breaker waits before letting a trial request through
+MAX_ATTEMPTS = 2 # Backends a single call may use, counting hedges and failovers
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def allow(self):
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        # Only one trial request at a time while half open
+        return self.state == "half_open" and not self.trial_in_flight
+
+    def reserve(self):
+        # Called when the backend is picked, so concurrent picks see the trial as taken
+        if self.state == "half_open":
+            self.trial_in_flight = True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        # Request was cancelled, it says nothing about the backend's health
+        self.trial_in_flight = False
+
+
+class Backend:
+    def __init__(self, name, url, api_key=None, model=None):
+        self.name = name
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.breaker = CircuitBreaker()
+        self.latencies = deque(maxlen=200)
+        self.inflight = 0
+        self.requests = 0
+        self.failures = 0
+
+    def headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def payload(self, payload):
+        if self.model:
+            return {**payload, "model": self.model}
+        return payload
+
+    def p95(self):
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def stats(self):
+        return {
+            "state": self.breaker.state,
+            "inflight": self.inflight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "p95": self.p95()
+        }
+
+
+def backends_from_env(default_url):
+    # LLM_BACKENDS='[{"url": ..., "api_key": ..., "model": ...}, ...]' takes precedence,
+    # then Groq keys API_KEY1..API_KEY4 and an OpenAI key, then the default endpoint
+    if os.getenv("LLM_BACKENDS"):
+        return [
+            Backend(b.get("name", f"backend{i}"), b["url"], b.get("api_key"), b.get("model"))
+            for i, b in enumerate(json.loads(os.getenv("LLM_BACKENDS")))
+        ]
+
+    backends = [
+        Backend(f"groq{i}", GROQ_URL, os.getenv(f"API_KEY{i}"), GROQ_MODEL)
+        for i in range(1, 5) if os.getenv(f"API_KEY{i}")
+    ]
+    if os.getenv("OPENAI_API_KEY"):
+        backends.append(Backend("openai", OPENAI_URL, os.getenv("OPENAI_API_KEY"), OPENAI_MODEL))
+
+    return backends or [Backend("default", default_url)]
+
+
+class OpenStream:
+    # A streamed response whose first chunk has arrived. Backends without
+    # streaming support answer with a plain completion, kept in body.
+    def __init__(self, backend, resp, stack):
+        self.backend = backend
+        self.headers = resp.headers
+        self.body = None
+        self._resp = resp
+        self._stack = stack
+        self._lines = None
+        self._first = None
+
+    async def first_chunk(self):
+        if not self.headers.get("content-type", "").startswith("text/event-stream"):
+            self.body = await self._resp.aread()
+            return
+        self._lines = self._resp.aiter_lines()
+        async for line in self._lines:
+            if line.strip():
+                self._first = line
+                break
+
+    async def lines(self):
+        if self._first is not None:
+            yield self._first
+        async for line in self._lines:
+            yield line
+
+    async def aclose(self):
+        await self._stack.aclose()
+
+
+class LLMRouter:
+    def __init__(self, backends, hedge_after=None):
+        self.backends = backends
+        # Fixed hedge delay in seconds, otherwise the primary backend's p95
+        self.hedge_after = hedge_after
+        self._rotation = itertools.count()
+        self.hedges = 0
+        self.backup_wins = 0
+
+    def pick(self, exclude=()):
+        candidates = [b for b in self.backends if b not in exclude and b.breaker.allow()]
+        if not candidates:
+            return None
+        # Least loaded backend, rotating between ties so keys share the traffic
+        offset = next(self._rotation)
+        ordered = candidates[offset % len(candidates):] + candidates[:offset % len(candidates)]
+        backend = min(ordered, key=lambda b: b.inflight)
+        backend.breaker.reserve()
+        return backend
+
+    def hedge_delay(self, backend):
+        if self.hedge_after is not None:
+            return self.hedge_after
+        return backend.p95()
+
+    async def _send(self, client, backend, payload):
+        backend.inflight += 1
+        backend.requests += 1
+        start = time.monotonic()
+        try:
+            resp = await client.post(backend.url, json=backend.payload(payload), headers=backend.headers())
+            resp.raise_for_status()
+            data = resp.json()
+        except asyncio.CancelledError:
+            backend.breaker.release()
+            raise
+        except Exception:
+            backend.failures += 1
+            backend.breaker.record_failure()
+            raise
+        finally:
+            backend.inflight -= 1
+
+        backend.latencies.append(time.monotonic() - start)
+        backend.breaker.record_success()
+        return data
+
+    async def _open_stream(self, client, backend, payload):
+        # Opens a streamed request and waits for its first chunk
+        backend.inflight += 1
+        backend.requests += 1
+        stack = AsyncExitStack()
+        try:
+            resp = await stack.enter_async_context(
+                client.stream("POST", backend.url, json=backend.payload(payload), headers=backend.headers())
+            )
+            resp.raise_for_status()
+            opened = OpenStream(backend, resp, stack)
+            await opened.first_chunk()
+        except asyncio.CancelledError:
+            backend.inflight -= 1
+            backend.breaker.release()
+            await stack.aclose()
+            raise
+        except Exception:
+            backend.inflight -= 1
+            backend.failures += 1
+            backend.breaker.record_failure()
+            await stack.aclose()
+            raise
+        return opened
+
+    async def _attempt_extra(self, attempt, client, backend, payload, acquire, sent):
+        # Hedges and failovers are extra requests, they wait for their own
+        # scheduler budget before going out
+        if acquire is not None:
+            try:
+                await acquire()
+            except BaseException:
+                backend.breaker.release()
+                raise
+        sent.add(backend)
+        return await attempt(client, backend, payload)
+
+    async def _race(self, attempt, client, payload, acquire, on_extra_usage, discard):
+        # Runs attempt on the least loaded backend, races a duplicate on another
+        # one once it is slower than its p95, and fails over once if everything
+        # in flight failed. Returns the first successful result, discard gets
+        # any other one. acquire is awaited before every attempt after the
+        # first, the caller already acquired for that one. on_extra_usage gets
+        # None for every sent attempt cancelled before its usage was known.
+        primary = self.pick()
+        if primary is None:
+            raise RuntimeError("No LLM backend available, all circuit breakers are open")
+
+        tried = [primary]
+        sent = {primary}
+        tasks = {asyncio.create_task(attempt(client, primary, payload)): primary}
+        pending = set(tasks)
+        delay = self.hedge_delay(primary)
+        hedged = False
+        error = None
+        won = False
+        result = None
+
+        def start_extra(backend):
+            tried.append(backend)
+            task = asyncio.create_task(self._attempt_extra(attempt, client, backend, payload, acquire, sent))
+            tasks[task] = backend
+            pending.add(task)
+
+        try:
+            while pending and not won:
+                timeout = delay if not hedged else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slower than its usual p95, race a duplicate on another backend
+                    hedged = True
+                    backup = self.pick(exclude=tried)
+                    if backup is not None:
+                        self.hedges += 1
+                        start_extra(backup)
+                    continue
+
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                    elif not won:
+                        if tasks[task] is not primary:
+                            self.backup_wins += 1
+                        won, result = True, task.result()
+                    else:
+                        # Finished together with the winner
+                        await discard(task.result())
+
+                # Everything in flight failed, fail over once to a backend not tried yet
+                if not won and not pending and len(tried) < MAX_ATTEMPTS:
+                    backup = self.pick(exclude=tried)
+                    if backup is not None:
+                        hedged = True
+                        start_extra(backup)
+        finally:
+            losers = list(pending)
+            for task in losers:
+                task.cancel()
+            outcomes = await asyncio.gather(*losers, return_exceptions=True)
+            for task, outcome in zip(losers, outcomes):
+                if not isinstance(outcome, BaseException):
+                    # Finished before the cancel landed
+                    await discard(outcome)
+                elif isinstance(outcome, asyncio.CancelledError) and tasks[task] in sent and on_extra_usage is not None:
+                    # The losing request was sent and is billed, its usage is unknown
+                    on_extra_usage(None)
+
+        if won:
+            return result
+        raise error
+
+    async def complete(self, client, payload, acquire=None, on_extra_usage=None):
+        async def discard(data):
+            if on_extra_usage is not None:
+                on_extra_usage(data.get("usage"))
+
+        return await self._race(self._send, client, payload, acquire, on_extra_usage, discard)
+
+    @asynccontextmanager
+    async def stream(self, client, payload, acquire=None, on_extra_usage=None):
+        # Streams are hedged and fail over like complete() until their first
+        # chunk arrives, the rest of the answer comes from that one backend
+        async def discard(opened):
+            opened.backend.inflight -= 1
+            opened.backend.breaker.release()
+            await opened.aclose()
+            if on_extra_usage is not None:
+                on_extra_usage(None)
+
+        opened = await self._race(self._open_stream, client, payload, acquire, on_extra_usage, discard)
+        backend = opened.backend
+        try:
+            yield opened
+        except (asyncio.CancelledError, GeneratorExit):
+            backend.breaker.release()
+            raise
+        except Exception:
+            backend.failures += 1
+            backend.breaker.record_failure()
+            raise
+        else:
+            backend.breaker.record_success()
+        finally:
+            backend.inflight -= 1
+            await opened.aclose()
+
+    def stats(self):
+        return {
+            "backends": {b.name: b.stats() for b in self.backends},
+            "hedges": self.hedges,
+            "backup_wins": self.backup_wins
+        }
@@ -0,0 +1,119 @@
+import os
+import asyncio
+import heapq
+import itertools
+import time
+
+# Lower number is served first
+PRIORITY_DISCUSSION = 0 # Someone is waiting on this turn
+PRIORITY_SUSPICION = 1 # Background score updates
+
+# Set either budget to 0 to disable it
+REQUESTS_PER_SECOND = float(os.getenv("LLM_REQUESTS_PER_SECOND", 10))
+TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 120000))
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate # Tokens added per second, 0 means unlimited
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount):
+        if self.rate <= 0:
+            return 0.0
+        # Requests bigger than the whole bucket only wait for a full bucket
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def consume(self, amount):
+        if self.rate > 0:
+            self.tokens -= amount
+
+
+class LLMScheduler:
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND, tokens_per_minute=TOKENS_PER_MINUTE):
+        self.request_bucket = TokenBucket(requests_per_second, max(1.0, requests_per_second))
+        self.token_bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        self._waiters = [] # heap of (priority, seq, tokens, future)
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._dispatcher = None
+
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.granted_by_priority = {}
+
+    async def acquire(self, priority, tokens):
+        # Waits until both the request and token budgets allow this call,
+        # serving higher priority (lower number) callers first
+        future = asyncio.get_running_loop().create_future()
+        enqueued = time.monotonic()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, future))
+        self._ensure_dispatcher()
+
+        await future
+
+        wait = time.monotonic() - enqueued
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.granted_by_priority[priority] = self.granted_by_priority.get(priority, 0) + 1
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        # Correct the token budget once the real usage of a call is known
+        self.token_bucket.consume(actual_tokens - estimated_tokens)
+
+    def _ensure_dispatcher(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self):
+        while self._waiters:
+            priority, _, tokens, future = self._waiters[0]
+            if future.done():
+                # Caller gave up (e.g. missed the suspicion deadline)
+                heapq.heappop(self._waiters)
+                continue
+
+            self.request_bucket.refill()
+            self.token_bucket.refill()
+            wait = max(self.request_bucket.time_until(1), self.token_bucket.time_until(tokens))
+
+            if wait <= 0:
+                heapq.heappop(self._waiters)
+                self.request_bucket.consume(1)
+                self.token_bucket.consume(tokens)
+                future.set_result(None)
+                continue
+
+            # Sleep until the budget refills, or until a new caller arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def queue_depth(self):
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth(),
+            "granted": self.granted,
+            "granted_by_priority": dict(self.granted_by_priority),
+            "avg_wait": self.total_wait / self.granted if self.granted else 0.0,
+            "max_wait": self.max_wait,
+            "requests_available": self.request_bucket.tokens,
+            "tokens_available": self.token_bucket.tokens
+        }
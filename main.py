@@ -7,6 +7,9 @@ import random
 import asyncio
 from game import Game_Manager
 from player_classes import AI_Player, Human_Player
+from llm_client import get_llm_client, close_llm_client
+from prefetch import ArgumentPrefetcher, TypingPreview
+from token_metrics import get_token_aggregator
 import logging
 
 logger = logging.getLogger('uvicorn.error')
@@ -16,11 +19,18 @@ NIGHT_DURATION = 30
 DISCUSSION_DURATION = 60
 VOTING_DURATION = 30
 REVOTE_DISCUSSION_DURATION = 45
+AI_TURN_DELAY = 6 # Pause before an AI posts its argument
+HUMAN_TURN_DELAY = 4 # Extra pause before an AI answers a human
+SUSPICION_CONCURRENCY = 4 # Max suspicion calls in flight per room
+SUSPICION_DEADLINE = 8 # Seconds before voting starts with whatever scores are ready
+STREAM_ARGUMENTS = True # Forward partial AI arguments to clients as typing frames
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     asyncio.create_task(periodic_room_cleanup())
     yield
+    await close_llm_client()
+    get_token_aggregator().write_snapshot()
 
 app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -91,12 +101,14 @@ async def create_room(player_data: dict = None):
         'game': Game_Manager(use_model=False),
         'clients': {},
         'lobby_clients': {},
-        'owner': creator_name
+        'owner': creator_name,
+        'prefetcher': ArgumentPrefetcher()
     }
     
     # Set up initial game state
     game = rooms[room_id]['game']
     game.round_number = 0
+    game.room_id = room_id
     
     if creator_name:
         game.add_player(Human_Player(creator_name))
@@ -181,7 +193,7 @@ async def start_game(room_id: str):
     # Start night phase timer immediately
     await start_phase_timer(room_id, NIGHT_DURATION, "night", "night_actions")
     
-    game.web_app_manager.process_ai_night_actions()
+    await process_ai_night_actions(game)
 
     await advance_game_phase(room_id)
 
@@ -195,12 +207,20 @@ async def advance_game_phase(room_id: str):
     room = get_room_or_error(room_id)
     game = room['game']
     
+    # AI players that have not acted yet get their policy actions off the event
+    # loop, recomputed if the phase moved on while inference was in flight
+    while True:
+        key = phase_key(game)
+        model_actions = await game.get_model_actions_async(game.web_app_manager.pending_ai_players())
+        if phase_key(game) == key:
+            break
+
     # Get the current phase before advancing
     current_phase = game.get_game_phase()
     current_sub_phase = game.sub_phase
     
     # Advance the game phase
-    phase_changed = game.web_app_manager.try_advance()
+    phase_changed = game.web_app_manager.try_advance(model_actions)
     
     # Get the new phase after advancing
     new_phase = game.get_game_phase()
@@ -229,7 +249,7 @@ async def advance_game_phase(room_id: str):
         # Start night phase
         await start_phase_timer(room_id, NIGHT_DURATION, "night", "night_actions")
         
-        game.web_app_manager.process_ai_night_actions()
+        await process_ai_night_actions(game)
     
     # If we've just entered night phase
     elif new_phase == "night" and current_phase == "day":
@@ -246,7 +266,7 @@ async def advance_game_phase(room_id: str):
             
         await start_phase_timer(room_id, NIGHT_DURATION, "night", "night_actions")
         
-        game.web_app_manager.process_ai_night_actions()
+        await process_ai_night_actions(game)
         
     # If we've just entered day phase
     elif new_phase == "day" and current_phase == "night":
@@ -294,6 +314,16 @@ async def advance_game_phase(room_id: str):
     
     return {"status": "advanced" if success else "failed", "phase": new_phase, "sub_phase": game.sub_phase}
 
+@app.get("/llm/stats")
+async def get_llm_stats():
+    llm = get_llm_client()
+    return {
+        "scheduler": llm.scheduler.stats(),
+        "router": llm.router.stats(),
+        "degraded": llm.degraded.stats(),
+        "tokens": get_token_aggregator().snapshot()
+    }
+
 @app.post("/room/{room_id}/auth")
 def authenticate_player(room_id: str, auth_request: dict):
     try:
@@ -321,7 +351,7 @@ async def remove_player(room_id: str, player_name: str, requester: str = None):
     player = get_player_or_error(game, player_name)
     
     # Remove player
-    game.players = [p for p in game.players if p.name != player_name]
+    game.remove_player(player_name)
     
     # Clean up connections
     if player_name in room.get('clients', {}):
@@ -397,13 +427,18 @@ async def process_ai_turn(game: Game_Manager, room_id: str):
     if not current_speaker or not isinstance(current_speaker, AI_Player) or not current_speaker.is_alive:
         return
 
-    await asyncio.sleep(6)
+    # Generate the argument while the turn delay runs instead of after it
+    prefetcher = rooms[room_id]['prefetcher']
+    on_delta = typing_callback(room_id, current_speaker_name)
+    prefetcher.prefetch(current_speaker, game, on_delta)
+
+    await asyncio.sleep(AI_TURN_DELAY)
     
     if room_id not in rooms or getattr(game, "game_over", False):
         return
 
     try:
-        ai_message = current_speaker.generate_argument(game)
+        ai_message = await prefetcher.take(current_speaker, game, on_delta)
     except Exception as e:
         logger.error(f"Error generating AI argument: {e}")
         ai_message = "I'll pass."
@@ -420,6 +455,21 @@ async def process_ai_turn(game: Game_Manager, room_id: str):
             if next_speaker and isinstance(next_speaker, AI_Player) and next_speaker.is_alive:
                 asyncio.create_task(process_ai_turn(game, room_id))
 
+def typing_callback(room_id: str, speaker_name: str):
+    if not STREAM_ARGUMENTS:
+        return None
+
+    async def send(text):
+        # Frames carry the text so far, so a regenerated argument simply replaces
+        # the preview, and an empty text removes it
+        await broadcast_to_room(room_id, {
+            "type": "typing",
+            "speaker": speaker_name,
+            "text": text
+        })
+
+    return TypingPreview(send)
+
 def dump_state(game: Game_Manager, player_name: str = None):
     state = {
         "phase": game.get_game_phase(),
@@ -624,6 +674,8 @@ async def delayed_room_cleanup(room_id: str, delay_seconds: int):
 
             if not active_humans:
                 logger.info(f"Cleaning up {'lobby' if is_lobby else 'game'} {room_id}")
+                room['prefetcher'].cancel_all()
+                get_token_aggregator().forget_room(room_id)
                 if 'game' in room:
                     del room['game']
                 del rooms[room_id]
@@ -662,9 +714,10 @@ def handle_action(game: Game_Manager, player_name: str, action_data: dict):
                 if next_speaker and isinstance(next_speaker, AI_Player) and next_speaker.is_alive:
                     for room_id, room in rooms.items():
                         if room['game'] is game:
+                            room['prefetcher'].prefetch(next_speaker, game, typing_callback(room_id, next_speaker.name))
                             def schedule_ai_turn():
                                 async def delayed_ai_turn():
-                                    await asyncio.sleep(4)
+                                    await asyncio.sleep(HUMAN_TURN_DELAY)
                                     asyncio.create_task(process_ai_turn(game, room_id))
                                 asyncio.create_task(delayed_ai_turn())
                             schedule_ai_turn()
@@ -874,22 +927,67 @@ async def handle_night_timeout(room_id: str):
     
     await advance_game_phase(room_id)
 
+async def update_ai_suspicions(game: Game_Manager):
+    ai_players = [p for p in game.get_alive_players() if isinstance(p, AI_Player)]
+    if not ai_players:
+        return
+
+    semaphore = asyncio.Semaphore(SUSPICION_CONCURRENCY)
+
+    async def update(player):
+        async with semaphore:
+            await player.update_suspicion_async(game)
+
+    tasks = {asyncio.create_task(update(p)): p for p in ai_players}
+    done, pending = await asyncio.wait(tasks, timeout=SUSPICION_DEADLINE)
+
+    # Scores are only written once a full response is parsed, so anyone that
+    # missed the deadline or failed simply keeps their previous suspicions
+    for task in pending:
+        task.cancel()
+        logger.warning(f"Suspicion update for {tasks[task].name} missed the deadline, keeping previous scores")
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for task in done:
+        if task.exception():
+            logger.error(f"Suspicion update for {tasks[task].name} failed: {task.exception()}")
+
+def phase_key(game: Game_Manager):
+    # Identifies the phase model actions were computed for
+    return (game.round_number, game.is_night, game.sub_phase, getattr(game, "game_over", False))
+
+async def process_ai_night_actions(game):
+    # Policy inference runs on the inference thread instead of the event loop
+    key = phase_key(game)
+    model_actions = await game.get_model_actions_async(game.web_app_manager.night_action_players())
+    if phase_key(game) != key:
+        # The night ended while inference was in flight
+        return
+    game.web_app_manager.process_ai_night_actions(model_actions)
+
 async def make_ai_players_vote(room_id: str, is_revote: bool = False):
     room = get_room_or_error(room_id)
     game = room['game']
     
-    ai_players = [p for p in game.get_alive_players() if isinstance(p, AI_Player)]
+    ai_players = [p for p in game.get_alive_players() if isinstance(p, AI_Player) and p.name not in game.votes]
+    key = phase_key(game)
+    model_actions = await game.get_model_actions_async(ai_players)
+    if phase_key(game) != key:
+        # Voting closed or moved on to a revote while inference was in flight
+        return
     for ai_player in ai_players:
-        if ai_player.name in game.votes:
+        # The game kept running while inference was in flight
+        if ai_player.name in game.votes or not ai_player.is_alive:
             continue
-            
+
         valid_targets = [p for p in game.get_alive_players() if p != ai_player]
         
         if is_revote and hasattr(game, 'tied_candidates'):
             valid_targets = [p for p in valid_targets if p.name in game.tied_candidates]
         
         if valid_targets:
-            target = ai_player.vote(game, valid_targets)
+            target = ai_player.vote(game, valid_targets, model_actions.get(ai_player.name))
             if target:
                 game.web_app_manager.vote_action(ai_player.name, target.name)
     
@@ -908,10 +1006,9 @@ async def start_voting_phase(room_id: str):
     game.discussion_history[round_num].append(("System", "Discussion time is over. Voting has begun."))
     
     game.votes = {}
+    room['prefetcher'].cancel_all()
 
-    for player in game.get_alive_players():
-        if isinstance(player, AI_Player):
-            player.update_suspicion(game)
+    await update_ai_suspicions(game)
     
     # AI players vote immediately
     await make_ai_players_vote(room_id, is_revote=False)
@@ -990,12 +1087,12 @@ async def handle_revoting_timeout(room_id: str):
     alive = game.get_alive_players()
     humans_with_night_roles = [p for p in alive if isinstance(p, Human_Player) and p.role in ("Mafia", "Doctor", "Investigator")]
     if not humans_with_night_roles:
-        game.web_app_manager.process_ai_night_actions()
+        await process_ai_night_actions(game)
         await advance_game_phase(room_id)
         return
 
     await start_phase_timer(room_id, NIGHT_DURATION, "night", "night_actions")
-    game.web_app_manager.process_ai_night_actions()
+    await process_ai_night_actions(game)
     await broadcast_to_room(room_id, dump_state(game))
 
 async def start_revote_discussion_phase(room_id: str):
@@ -1040,10 +1137,9 @@ async def start_revote_voting_phase(room_id: str):
     game.discussion_history[round_num].append(("System", "Discussion is over. Please revote now."))
     
     game.votes = {}
+    room['prefetcher'].cancel_all()
 
-    for player in game.get_alive_players():
-        if isinstance(player, AI_Player):
-            player.update_suspicion(game)
+    await update_ai_suspicions(game)
     
     await make_ai_players_vote(room_id, is_revote=True)
 
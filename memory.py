@@ -1,46 +1,230 @@
+import re
+import zlib
 import numpy as np
-from collections import deque
-from sklearn.feature_extraction.text import TfidfVectorizer
+from collections import deque, OrderedDict
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b") # Same tokens sklearn's TfidfVectorizer used
+TERM_CACHE_SIZE = 256 # Recent event texts whose term counts are kept
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class MemoryModel:
+    # Hashed vocabulary and idf shared by every agent memory in a room. The
+    # same event text is usually written to several agents, so it is
+    # tokenized once here and each agent only keeps its term counts.
+    def __init__(self, embed_dim=32, decay=None):
+        self.embed_dim = embed_dim
+        # Document frequencies over the events every attached memory holds
+        self.doc_freq = np.zeros(embed_dim, dtype=np.float64)
+        self.n_docs = 0
+        # With a decay factor, evicted events keep contributing to the idf
+        # with a weight that shrinks by decay on every write
+        self.decay = decay
+        self.evicted_doc_freq = np.zeros(embed_dim, dtype=np.float64)
+        self.evicted_docs = 0.0
+        self.version = 0 # Bumped whenever the idf changes
+        self._idf = None
+        self._term_cache = OrderedDict()
+
+    def term_counts(self, text):
+        counts = self._term_cache.get(text)
+        if counts is not None:
+            self._term_cache.move_to_end(text)
+            return counts
+
+        counts = np.zeros(self.embed_dim, dtype=np.float64)
+        for token in tokenize(text):
+            counts[zlib.crc32(token.encode()) % self.embed_dim] += 1
+        counts.flags.writeable = False # Shared between memories
+
+        self._term_cache[text] = counts
+        if len(self._term_cache) > TERM_CACHE_SIZE:
+            self._term_cache.popitem(last=False)
+        return counts
+
+    def add_document(self, counts, n=1):
+        # n memories received the same event
+        if self.decay is not None:
+            self.evicted_doc_freq *= self.decay ** n
+            self.evicted_docs *= self.decay ** n
+        self.doc_freq += n * (counts > 0)
+        self.n_docs += n
+        self._changed()
+
+    def remove_documents(self, rows, evicted=True):
+        present = (rows > 0).sum(axis=0)
+        self.doc_freq -= present
+        self.n_docs -= len(rows)
+        if evicted and self.decay is not None:
+            self.evicted_doc_freq += present
+            self.evicted_docs += len(rows)
+        self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._idf = None
+
+    def idf(self):
+        # Smoothed idf, as in TfidfVectorizer(smooth_idf=True)
+        if self._idf is None:
+            doc_freq = self.doc_freq + self.evicted_doc_freq
+            n_docs = self.n_docs + self.evicted_docs
+            self._idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+        return self._idf
+
 
 class AgentMemory:
-    def __init__(self, max_size=100, embed_dim=32):
-        # Raw text events
+    def __init__(self, max_size=100, embed_dim=32, decay=None, model=None):
+        self.embed_dim = embed_dim
+        self.max_size = max_size
+        # Raw text events, the oldest is evicted once full
         self.events = deque(maxlen=max_size)
-        # Simple TF‑IDF vectorizer to embed text → high‑dim sparse
-        self.vectorizer = TfidfVectorizer(max_features=embed_dim)
-        # Running corpus
-        self.corpus = []
+        # Term counts of the held events in a preallocated ring, row _head is the
+        # next one overwritten. Squared counts are kept for cheap norms.
+        self.rows = np.zeros((max_size, embed_dim), dtype=np.float64)
+        self.sq_rows = np.zeros((max_size, embed_dim), dtype=np.float64)
+        self._head = 0
+        # A private model until the game attaches the room's shared one
+        self.model = model if model is not None else MemoryModel(embed_dim, decay)
+        # Term counts of all held events, kept up to date on every write
+        self.tf_sum = np.zeros(embed_dim, dtype=np.float64)
+        self.version = 0
+        self._memory = None
+        self._memory_key = None
+        self._norms = None
+        self._norms_key = None
+
+    def _held(self):
+        return self.rows[:len(self.events)]
+
+    def attach(self, model):
+        # Move this memory's documents over to another (usually shared) model
+        if model is self.model:
+            return
+        held = self._held()
+        if len(held):
+            self.model.remove_documents(held, evicted=False)
+            for counts in held:
+                model.add_document(counts)
+        self.model = model
+        self.version += 1
+
+    @staticmethod
+    def _normalize(vecs):
+        norms = np.linalg.norm(vecs, axis=-1, keepdims=True)
+        return np.divide(vecs, norms, out=np.zeros_like(vecs), where=norms > 0)
+
+    def _append(self, event, counts):
+        # Stores the event and returns the evicted row, the caller updates the model
+        evicted = None
+        if len(self.events) == self.max_size:
+            evicted = self.rows[self._head].copy()
+            self.tf_sum -= evicted
 
-    def write(self, event: str):
-        # Add event to memory
         self.events.append(event)
-        self.corpus.append(event)
-        self.vectorizer.fit(self.corpus)
+        self.rows[self._head] = counts
+        self.sq_rows[self._head] = counts * counts
+        self._head = (self._head + 1) % self.max_size
+        self.tf_sum += counts
+        self.version += 1
+        return evicted
 
-    def read(self, query, top_k=5):
-        # Return the average embedding of the top_k most relevant past events
+    def write(self, event: str):
+        # Add event to memory, O(len(event)) and never more than max_size events held
+        counts = self.model.term_counts(event)
+        evicted = self._append(event, counts)
+        if evicted is not None:
+            self.model.remove_documents(evicted[None])
+        self.model.add_document(counts)
+
+    def _event_norms(self, idf):
+        # Norms of the idf weighted rows, one matrix-vector product per change
+        key = (self.version, self.model.version)
+        if key != self._norms_key:
+            self._norms = np.sqrt(self.sq_rows[:len(self.events)] @ (idf * idf))
+            self._norms_key = key
+        return self._norms
+
+    def read_many(self, queries, top_k=5):
+        # Return, for each query, the average embedding of its top_k most relevant past events
         if not self.events:
-            return np.zeros(self.vectorizer.max_features)
+            return np.zeros((len(queries), self.embed_dim))
+
+        idf = self.model.idf()
+        rows = self._held()
+        norms = self._event_norms(idf)
+        safe_norms = np.where(norms > 0, norms, 1.0)
 
-        # Embed all events + query
-        all_texts = list(self.events) + [query]
-        tfidf = self.vectorizer.transform(all_texts).toarray()
-        query_vec = tfidf[-1]
-        event_vecs = tfidf[:-1]
+        query_vecs = self._normalize(np.array([self.model.term_counts(q) for q in queries]) * idf)
 
-        # Cosine similarity
-        sims = event_vecs @ query_vec / (np.linalg.norm(event_vecs, axis=1)*np.linalg.norm(query_vec)+1e-8)
-        top_idxs = np.argsort(sims)[-top_k:]
+        # Cosine similarity of every event with every query, events are
+        # normalised here instead of materialising the weighted matrix
+        sims = (rows @ (query_vecs * idf).T) / (safe_norms[:, None] + 1e-8)
+        k = min(top_k, len(rows))
+        top_idxs = np.argpartition(-sims, k - 1, axis=0)[:k].T
 
         # Return the average embeddings
-        return event_vecs[top_idxs].mean(axis=0)
-    
+        scale = idf / safe_norms[top_idxs][..., None]
+        return (rows[top_idxs] * scale).mean(axis=1)
+
+    def read(self, query, top_k=5):
+        return self.read_many([query], top_k)[0]
+
     def get_memory(self):
-        # Return the events as a array of vectors with length 32
-        if not self.events:
-            return np.zeros(32, dtype=np.float32)
-        tfidf = self.vectorizer.transform([' '.join(self.events)]).toarray()[0]
+        # Return the events as a array of vectors with length 32. Only rebuilt
+        # when this memory or the shared idf changed since the last call
+        key = (self.version, self.model.version)
+        if key == self._memory_key:
+            return self._memory
 
         mem = np.zeros(32, dtype=np.float32)
-        mem[:min(32, len(tfidf))] = tfidf[:32]
+        if self.events:
+            # Term counts of the joined events are the sum of each event's counts
+            tfidf = self._normalize(self.tf_sum * self.model.idf())
+            mem[:min(32, len(tfidf))] = tfidf[:32]
+        mem.flags.writeable = False # Shared by every caller until the next change
+
+        self._memory = mem
+        self._memory_key = key
         return mem
+
+
+class MemoryBus:
+    # Room-level channel for public events. Publishing tokenizes the event once
+    # and updates the shared document frequencies once, however many agents
+    # receive it.
+    def __init__(self, model):
+        self.model = model
+        self.subscribers = {} # name -> AgentMemory
+
+    def subscribe(self, name, memory):
+        memory.attach(self.model)
+        self.subscribers[name] = memory
+
+    def unsubscribe(self, name):
+        # The departing memory takes its documents with it to a private model
+        memory = self.subscribers.pop(name, None)
+        if memory is not None and memory.model is self.model:
+            memory.attach(MemoryModel(memory.embed_dim, self.model.decay))
+
+    def publish(self, event, names=None):
+        # Send to every subscriber, or only to the given names
+        if names is None:
+            memories = list(self.subscribers.values())
+        else:
+            memories = [self.subscribers[n] for n in names if n in self.subscribers]
+        if not memories:
+            return
+
+        counts = self.model.term_counts(event)
+        evicted = [row for row in (m._append(event, counts) for m in memories) if row is not None]
+        if evicted:
+            self.model.remove_documents(np.array(evicted))
+        self.model.add_document(counts, len(memories))
+
+    def publish_many(self, events, names=None):
+        for event in events:
+            self.publish(event, names)
@@ -1,38 +1,147 @@
+import os
+import json
+import threading
 import torch
-import ray
-from ray.rllib.algorithms.ppo import PPO
-from ray.tune.registry import register_env
-from ray.rllib.env import ParallelPettingZooEnv
 import numpy as np
+from game_state import ROLE_INDEX
+
+POLICY_IDS = ["Villager", "Mafia", "Doctor", "Investigator"]
+EXPORT_MANIFEST = "policies.json" # Written by export_policies.py next to the TorchScript files
+
+
+def load_checkpoint_modules(checkpoint_path):
+    # Restores the RLlib algorithm to pull out its RLModules. Needs the Ray
+    # runtime, so it is only used for raw checkpoints and by export_policies.py
+    import ray
+    from ray.rllib.algorithms.ppo import PPO
+    from ray.tune.registry import register_env
+    from ray.rllib.env import ParallelPettingZooEnv
+    from train import MafiaEnv
+
+    register_env(
+        "mafia",
+        lambda cfg: ParallelPettingZooEnv(MafiaEnv(**cfg))
+    )
+    ray.init(ignore_reinit_error=True)
+
+    algo = PPO.from_checkpoint(checkpoint_path)
+    return {policy_id: algo.get_module(policy_id) for policy_id in POLICY_IDS}
+
+
+def quantize_module(module):
+    # int8 weights for every Linear layer, activations are quantized on the
+    # fly, which suits small MLP policies served on CPU
+    return torch.ao.quantization.quantize_dynamic(module.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class ScriptedPolicy:
+    # An exported policy, stands in for the RLModule with the same
+    # forward_inference call but only needs torch
+    def __init__(self, path, obs_dim):
+        self.net = torch.jit.load(path, map_location="cpu")
+        self.net.eval()
+        self.obs_dim = obs_dim
+
+    def forward_inference(self, batch):
+        return {"action_dist_inputs": self.net(batch["obs"])}
+
 
 class ModelManager:
-    def __init__(self, checkpoint_path):
-        from train import MafiaEnv
-        register_env(
-            "mafia",
-            lambda cfg: ParallelPettingZooEnv(MafiaEnv(**cfg))
-        )
-        ray.init(ignore_reinit_error=True)
-
-        self.algo = PPO.from_checkpoint(checkpoint_path)
-
-        self.modules = {
-            policy_id: self.algo.get_module(policy_id)
-            for policy_id in ["Villager", "Mafia", "Doctor", "Investigator"]
-        }
-
-        villager_module = self.modules["Villager"]
-        self.obs_dim = villager_module.observation_space.shape[0]
+    def __init__(self, model_path, quantized=False):
+        # model_path is either a directory from export_policies.py, loaded
+        # without Ray, or a raw RLlib checkpoint. quantized picks the int8
+        # policies, check them with check_quantized.py first
+        self.quantized = quantized
+        manifest_path = os.path.join(model_path, EXPORT_MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            key = "int8_file" if quantized else "file"
+            if any(key not in info for info in manifest["policies"].values()):
+                raise ValueError(f"{model_path} has no int8 policies, export it with --quantize")
+            self.modules = {
+                policy_id: ScriptedPolicy(os.path.join(model_path, info[key]), manifest["obs_dim"])
+                for policy_id, info in manifest["policies"].items()
+            }
+            self.obs_dim = manifest["obs_dim"]
+        else:
+            self.modules = load_checkpoint_modules(model_path)
+            villager_module = self.modules["Villager"]
+            self.obs_dim = villager_module.observation_space.shape[0]
+            if quantized:
+                self.modules = {policy_id: quantize_module(module) for policy_id, module in self.modules.items()}
+
+    def freeze(self):
+        # Rooms share these weights, so nothing may train or modify them
+        for module in self.modules.values():
+            net = module.net if isinstance(module, ScriptedPolicy) else module
+            net.eval()
+            for param in net.parameters():
+                param.requires_grad_(False)
+
+    def warm_up(self):
+        # One dummy pass per policy so the first real vote does not pay for lazy init
+        dummy = np.zeros(self.obs_dim, dtype=np.float32)
+        self.get_actions([dummy] * len(self.modules), list(self.modules))
     
     def get_action(self, obs, role):
-        module = self.modules[role]
-        tensor_obs = torch.as_tensor(obs, dtype=torch.float32).reshape(1, -1)
-        
-        output = module.forward_inference({"obs": tensor_obs})
-        action_dist = output["action_dist_inputs"]
-        
-        action = torch.argmax(action_dist, dim=-1).item()
-        return action
+        return self.get_actions([obs], [role])[0]
+
+    def get_actions(self, observations, roles):
+        # One forward pass per role policy for the whole batch, actions come
+        # back in the same order as the observations
+        actions = [None] * len(observations)
+        by_role = {}
+        for i, role in enumerate(roles):
+            by_role.setdefault(role, []).append(i)
+
+        with torch.no_grad():
+            for role, idxs in by_role.items():
+                module = self.modules[role]
+                tensor_obs = torch.as_tensor(np.stack([observations[i] for i in idxs]), dtype=torch.float32)
+
+                output = module.forward_inference({"obs": tensor_obs})
+                action_dist = output["action_dist_inputs"]
+
+                for i, action in zip(idxs, torch.argmax(action_dist, dim=-1).tolist()):
+                    actions[i] = action
+        return actions
+
+
+class PolicyRegistry:
+    # Process-wide cache of loaded models, so every model-backed room shares
+    # one read-only copy of each checkpoint's weights
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+        self._path_locks = {}
+
+    def get(self, model_path, quantized=False):
+        key = (os.path.abspath(model_path), quantized)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        # Loads of different models can run side by side, the same one loads once
+        with self._lock:
+            path_lock = self._path_locks.setdefault(key, threading.Lock())
+        with path_lock:
+            model = self._models.get(key)
+            if model is None:
+                model = ModelManager(key[0], quantized)
+                model.freeze()
+                model.warm_up()
+                self._models[key] = model
+        return model
+
+    def loaded(self):
+        return list(self._models)
+
+
+_policy_registry = PolicyRegistry()
+
+def get_model(model_path, quantized=False):
+    return _policy_registry.get(model_path, quantized)
 
 
 class ObservationManager:
@@ -40,49 +149,20 @@ class ObservationManager:
         self.game = game_manager
         
     def get_observation(self, player):
-        alive_mask = np.array([1.0 if p.is_alive else 0.0 for p in self.game.players], dtype=np.float32)
+        state = self.game.state
+        alive_mask = state.alive
 
-        suspicions = np.array([player.suspicions.get(p.name, 0.0) for p in self.game.players], dtype=np.float32)
-        mem = player.memory.get_memory().astype(np.float32)
+        suspicions = np.array([player.suspicions.get(name, 0.0) for name in state.names], dtype=np.float32)
+        mem = player.memory.get_memory()
 
-        role_map = {'Villager': 0, 'Mafia': 1, 'Doctor': 2, 'Investigator': 3}
-        onehot = np.array([0] * 4, dtype=np.float32)
-        onehot[role_map[player.role]] = 1
+        onehot = np.zeros(4, dtype=np.float32)
+        onehot[ROLE_INDEX[player.role]] = 1
 
-        phase = np.array([1.0 if self.game.is_night else 0.0], dtype=np.float32)
-        round_number = np.array([float(self.game.round_number)], dtype=np.float32)
+        phase_round = np.array([1.0 if self.game.is_night else 0.0, float(self.game.round_number)], dtype=np.float32)
 
         action_mask = self.create_action_mask(player)
 
-        return np.concatenate([alive_mask, suspicions, mem, onehot, phase, round_number, action_mask])
+        return np.concatenate([alive_mask, suspicions, mem, onehot, phase_round, action_mask])
     
     def create_action_mask(self, player):
-        action_mask = np.zeros(len(self.game.players), dtype=np.float32)
-        if self.game.is_night == True:
-            if player.role == "Mafia":
-                for i, p in enumerate(self.game.players):
-                    if p.is_alive and p.role != "Mafia":
-                        action_mask[i] = 1.0
-            elif player.role == "Doctor":
-                for i, p in enumerate(self.game.players):
-                    if p.is_alive and p != player:
-                        action_mask[i] = 1.0
-            elif player.role == "Investigator":
-                valid_targets = [i for i, p in enumerate(self.game.players)
-                                    if p.is_alive and p != player and p not in self.game.already_investigated]
-                if valid_targets:
-                    for i in valid_targets:
-                        action_mask[i] = 1.0
-                else:
-                    # If no targets that haven't been investigated, allow all alive players
-                    for i, p in enumerate(self.game.players):
-                        if p.is_alive and p != player:
-                            action_mask[i] = 1.0
-            else:
-                pass # Villager has no actions at night
-        else:
-            for i, p in enumerate(self.game.players):
-                if p.is_alive and p != player:
-                    action_mask[i] = 1.0
-        
-        return action_mask
\ No newline at end of file
+        return self.game.state.action_mask(player.name, player.role, self.game.is_night == True)
@@ -52,7 +52,7 @@ class PhaseManager:
 
                 target = mafia.vote(self.game, eligible_targets)
                 if not target.is_protected:
-                    target.is_alive = False
+                    self.game.eliminate(target)
                     death.append(target)
                 else:
                     target.is_protected = False
@@ -86,7 +86,7 @@ class PhaseManager:
                     investigator.update_suspicion_investigation(target, target.role == "Mafia")
 
                 self.game.last_investigated.append((investigator, target.name, target.role == "Mafia"))
-                self.game.already_investigated.add(target)
+                self.game.mark_investigated(target)
 
                 if isinstance(investigator, AI_Player):
                     desc = f"{investigator.name} investigated {target.name}: {'Mafia' if target.role=='Mafia' else 'Innocent'}"
@@ -106,9 +106,7 @@ class PhaseManager:
             for d in self.game.last_deaths:
                 print(f"{d.name} has died.")
 
-                for player in self.game.get_alive_players():
-                    if isinstance(player, AI_Player):
-                        player.memory.write(f"{d.name} was killed during the night.")
+            self.game.publish_events([f"{d.name} was killed during the night." for d in self.game.last_deaths])
         else:
             print("\nNo one was killed during the night.")
         print("\nDiscussion starts now (2 minutes).")
@@ -176,7 +174,7 @@ class PhaseManager:
                 print(f"{eliminated.name} was a Mafia.")
             else:
                 print(f"{eliminated.name} was not a Mafia.")
-            eliminated.is_alive = False
+            self.game.eliminate(eliminated)
         else:
             print("\nThere is a tie between:")
             for p in most_voted:
@@ -208,7 +206,7 @@ class PhaseManager:
                     print(f"{eliminated.name} was a Mafia.")
                 else:
                     print(f"{eliminated.name} was not a Mafia.")
-                eliminated.is_alive = False
+                self.game.eliminate(eliminated)
             else:
                 print(f"\nStill tied! Voting will be skipped for this round.")
         
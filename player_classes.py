@@ -2,31 +2,18 @@ import random
 import json
 import openai
 import requests
-import os
-from dotenv import load_dotenv
 from memory import AgentMemory
+from llm_client import get_llm_client, API_URL, API_TIMEOUT, FALLBACK_RESPONSE
+from llm_scheduler import PRIORITY_DISCUSSION, PRIORITY_SUSPICION
+from token_metrics import get_token_aggregator
+from heuristics import HeuristicTracker, template_argument
+from log_setup import setup_logging
 from prompts import SYSTEM_BASE, SUSPICION_INSTRUCTIONS, ARGUMENT_INSTRUCTIONS, ARGUMENT_STYLES
 import logging
 import time
 from datetime import datetime
 
-# load_dotenv()
-# API_KEY1 = os.getenv("API_KEY1")
-# API_KEY2 = os.getenv("API_KEY2")
-# API_KEY3 = os.getenv("API_KEY3")
-# API_KEY4 = os.getenv("API_KEY4")
-# API_KEYS = [API_KEY1, API_KEY2, API_KEY3, API_KEY4]
-# API_KEY = os.getenv("API_KEY")
-# openai.api_key = API_KEY
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler("api_calls.log"),
-        logging.StreamHandler()
-    ]
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 class Player:
@@ -70,9 +57,11 @@ class AI_Player(Player):
         self.suspicions = {} # Key values will be the name of another player
         self.memory = AgentMemory(max_size=100, embed_dim=32)
         self.argument_style = random.choice(ARGUMENT_STYLES)
+        self.heuristics = HeuristicTracker() # Stands in for the LLM while it is degraded
         print(f"AI Player {self.name} initialized with argument style: {self.argument_style}")
 
-    def vote(self, game_manager, valid_targets=None):
+    def vote(self, game_manager, valid_targets=None, model_action=None):
+        # model_action is this player's policy output when the caller batched inference
         if not game_manager.use_model:
             # If not using model, use old voting logic
             if game_manager.get_game_phase() == "night":
@@ -101,11 +90,20 @@ class AI_Player(Player):
                 else:
                     return self._vote_most_suspicious(valid_targets)
 
-        obs = game_manager.get_observation(self)
-        action = game_manager.model.get_action(obs, self.role)
+        obs = None
+        if model_action is None:
+            obs = game_manager.get_observation(self)
+            model_action = game_manager.model.get_action(obs, self.role)
+        return self._vote_from_action(game_manager, obs, model_action, valid_targets)
+
+    def _vote_from_action(self, game_manager, obs, action, valid_targets):
+        # Falls back to the most suspicious player when the policy picks an invalid target.
+        # obs is only needed for its action mask, batched callers pass None
         target = game_manager.players[action]
 
         if not valid_targets:
+            if obs is None:
+                obs = game_manager.get_observation(self)
             valid_target_idx = obs[-len(game_manager.players):]
             if valid_target_idx[action] == 0:
                 valid_targets = [p for p in game_manager.get_alive_players() if p != self]
@@ -157,29 +155,27 @@ class AI_Player(Player):
         else:
             self.suspicions[target.name] = -1.0
 
-    def update_suspicion(self, game_manager):
-        history = game_manager.discussion_history.get(game_manager.round_number, [])
-        history = history[-9:] if len(history) > 9 else history
-        history_str = '\n'.join(f"{s}: {l}" for s, l in history) or "No discussion yet."
-        alive = [p for p in game_manager.get_alive_players() if p.is_alive and p != self]
+    def _build_suspicion_messages(self, game_manager):
+        ctx = game_manager.get_round_context()
 
         context = (
             f"Name:{self.name} Role:{self.role}"
-            + (f" MafiaTeam:{','.join(p.name for p in alive if p.role=='Mafia')}" if self.role=='Mafia' else "")
-            + f" Alive:{','.join(p.name for p in alive)}"
+            + (f" MafiaTeam:{ctx.mafia_except(self.name)}" if self.role=='Mafia' else "")
+            + f" Alive:{ctx.alive_except(self.name)}"
             + f" Scores:{';'.join(f'{k}:{v:.1f}' for k,v in self.suspicions.items())}" 
         )
 
-        messages = [
+        return [
             {"role": "system", "content": SYSTEM_BASE},
             {"role": "system", "content": SUSPICION_INSTRUCTIONS},
             {"role": "user", "content": context},
-            {"role": "user", "content": f"Discussion:{history_str}"}
+            {"role": "user", "content": f"Discussion:{ctx.history_str(9)}"}
         ]
 
-        new_suspicions = self.call_api(messages)
-        new_suspicions = json.loads(new_suspicions)
+    def _apply_suspicions(self, game_manager, response):
+        self._set_suspicions(game_manager, json.loads(response))
 
+    def _set_suspicions(self, game_manager, new_suspicions):
         for player_name, score in new_suspicions.items():
             self.suspicions[player_name] = score
 
@@ -191,56 +187,86 @@ class AI_Player(Player):
         if self.name in self.suspicions:
             del self.suspicions[self.name]
 
-    def generate_argument(self, game_manager):
-        history = game_manager.discussion_history.get(game_manager.round_number, [])
-        history = history[-4:] if len(history) > 4 else history
-        history_str = '\n'.join(f"{s}: {l}" for s, l in history) or "No discussion yet."
-        alive_players = game_manager.get_alive_players()
+    def update_suspicion(self, game_manager):
+        messages = self._build_suspicion_messages(game_manager)
+        self._apply_suspicions(game_manager, self.call_api(messages, call_type="suspicion"))
+
+    async def update_suspicion_async(self, game_manager):
+        if get_llm_client().degraded.active():
+            self._set_suspicions(game_manager, self.heuristics.update(self, game_manager))
+            return
+
+        messages = self._build_suspicion_messages(game_manager)
+        response = await self.call_api_async(
+            messages, priority=PRIORITY_SUSPICION,
+            call_type="suspicion", room_id=game_manager.room_id
+        )
+        self._apply_suspicions(game_manager, response)
+
+    def _build_argument_messages(self, game_manager):
+        ctx = game_manager.get_round_context()
 
         context = (
             f"Role:{self.role} Name:{self.name}"
-            + (f" Fellow Mafia:{','.join(p.name for p in game_manager.get_alive_players() if p.role=='Mafia' and p!=self)}" if self.role=='Mafia' else "")
-            + f" Alive:{','.join(p.name for p in game_manager.get_alive_players())}"
-            + f" Last Killed:{','.join(p.name for p in game_manager.last_deaths) or 'None'}"
-            + (f" Voted Out:{game_manager.last_voted_out.name}({game_manager.last_voted_out.role[0]})" if game_manager.last_voted_out else " Voted Out:None")
+            + (f" Fellow Mafia:{ctx.mafia_except(self.name)}" if self.role=='Mafia' else "")
+            + f" Alive:{ctx.alive_str}"
+            + f" Last Killed:{ctx.last_killed}"
+            + ctx.voted_out
             + f" Top Suspicions:{','.join(f'{k[:3]}:{v:.1f}' for k,v in sorted(self.suspicions.items(), key=lambda x: x[1], reverse=True)[:3])}" 
             + f" Round:{game_manager.round_number}"
-            + f" Mafia Left:{sum(1 for p in game_manager.get_alive_players() if p.role=='Mafia')}"
+            + f" Mafia Left:{ctx.mafia_left}"
         )
         
         # Role specific context
-        if self.role == "Doctor" and hasattr(game_manager, 'last_protected'):
-            doctor_actions = [(doctor, p) for doctor, p in game_manager.last_protected if doctor.name == self.name]
-            if doctor_actions:
-                context += f" Protected:{doctor_actions[0][1].name}"
+        if self.role == "Doctor" and self.name in ctx.protected_by:
+            context += f" Protected:{ctx.protected_by[self.name]}"
         
-        elif self.role == "Investigator" and hasattr(game_manager, 'last_investigated'):
-            investigations = [(name, is_mafia) for investigator, name, is_mafia in game_manager.last_investigated if investigator.name == self.name]
-            if investigations:
-                name, is_mafia = investigations[0]
-                context += f" Investigated:{name}({'M' if is_mafia else 'NM'})"
+        elif self.role == "Investigator" and self.name in ctx.investigated_by:
+            name, is_mafia = ctx.investigated_by[self.name]
+            context += f" Investigated:{name}({'M' if is_mafia else 'NM'})"
         
-        messages = [
+        return [
             {"role": "system", "content": SYSTEM_BASE},
             {"role": "system", "content": ARGUMENT_INSTRUCTIONS},
             {"role": "system", "content": f"Argument Style:{self.argument_style}"},
             {"role": "user", "content": context},
-            {"role": "user", "content": f"Chat:{history_str}"}
+            {"role": "user", "content": f"Chat:{ctx.history_str(4)}"}
         ]
-        
-        return self.call_api(messages)
 
-    def call_api(self, messages):
+    def generate_argument(self, game_manager):
+        return self.call_api(self._build_argument_messages(game_manager))
+
+    async def generate_argument_async(self, game_manager, messages=None, on_delta=None):
+        if get_llm_client().degraded.active():
+            return template_argument(self, game_manager)
+        if messages is None:
+            messages = self._build_argument_messages(game_manager)
+        return await self.call_api_async(messages, on_delta=on_delta, room_id=game_manager.room_id)
+
+    def _log_api_request(self, messages):
         msg_content_length = sum(len(m.get("content", "")) for m in messages)
         token_estimate = msg_content_length // 4
         
         request_id = f"{self.name}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
         logger.info(f"API Request [{request_id}] - Role: {self.role}, Est. Tokens: {token_estimate}")
         
-        for i, msg in enumerate(messages):
-            content_preview = msg.get("content", "")[:50] + "..." if len(msg.get("content", "")) > 50 else msg.get("content", "")
-            logger.debug(f"Message {i}: {msg.get('role')} - {content_preview}")
-        
+        # One record per request so sampling keeps or drops all of its previews together
+        if logger.isEnabledFor(logging.DEBUG):
+            previews = []
+            for i, msg in enumerate(messages):
+                content_preview = msg.get("content", "")[:50] + "..." if len(msg.get("content", "")) > 50 else msg.get("content", "")
+                previews.append(f"Message {i}: {msg.get('role')} - {content_preview}")
+            logger.debug(f"API Request [{request_id}] previews\n" + "\n".join(previews))
+
+        return request_id
+
+    def _log_api_response(self, request_id, duration, response_content):
+        response_preview = response_content[:50] + "..." if len(response_content) > 50 else response_content
+        logger.info(f"API Response [{request_id}] - Success - Duration: {duration:.2f}s - Response: {response_preview}")
+
+    def call_api(self, messages, call_type="argument"):
+        # Blocking variant, only used by the terminal game loop in PhaseManager
+        request_id = self._log_api_request(messages)
         start_time = time.time()
         
         payload = {
@@ -251,46 +277,54 @@ class AI_Player(Player):
             # "stop": ["\n\n"]
         }
 
-        # resp = requests.post(
-        #     "https://api.groq.com/openai/v1/chat/completions",
-        #     headers={
-        #         "Content-Type": "application/json",
-        #         "Authorization": f"Bearer {random.choice(API_KEYS)}"
-        #     },
-        #     json=payload,
-        #     timeout=30
-        # )
-
         try:
             resp = requests.post(
-                "https://ai.hackclub.com/chat/completions",
+                API_URL,
                 headers={"Content-Type": "application/json"},
                 json=payload,
-                timeout=30
+                timeout=API_TIMEOUT
             )
             
             resp.raise_for_status()
             data = resp.json()
-            end_time = time.time()
-            duration = end_time - start_time
-            
             response_content = data["choices"][0]["message"]["content"].strip()
-            
-            response_preview = response_content[:50] + "..." if len(response_content) > 50 else response_content
-            logger.info(f"API Response [{request_id}] - Success - Duration: {duration:.2f}s - Response: {response_preview}")
+            self._log_api_response(request_id, time.time() - start_time, response_content)
+            get_token_aggregator().record_response(
+                messages, response_content, data.get("usage"), role=self.role, call_type=call_type
+            )
             
             return response_content
             
         except Exception as e:
-            end_time = time.time()
-            duration = end_time - start_time
-            
+            duration = time.time() - start_time
             logger.error(f"API Error [{request_id}] - Duration: {duration:.2f}s - Error: {str(e)}")
             
-            return "I need to think about the situation."
+            return FALLBACK_RESPONSE
 
         # return call_chatgpt(messages)
 
+    async def call_api_async(self, messages, on_delta=None, priority=PRIORITY_DISCUSSION, call_type="argument", room_id=None):
+        # Non-blocking variant used by the web server, shares one pooled client
+        request_id = self._log_api_request(messages)
+        start_time = time.time()
+
+        tags = {"room_id": room_id, "role": self.role, "call_type": call_type}
+
+        try:
+            if on_delta is not None:
+                response_content = await get_llm_client().stream_chat(messages, on_delta, max_tokens=32, priority=priority, tags=tags)
+            else:
+                response_content = await get_llm_client().chat(messages, max_tokens=32, priority=priority, tags=tags)
+            self._log_api_response(request_id, time.time() - start_time, response_content)
+
+            return response_content
+
+        except Exception as e:
+            duration = time.time() - start_time
+            logger.error(f"API Error [{request_id}] - Duration: {duration:.2f}s - Error: {str(e)}")
+
+            return FALLBACK_RESPONSE
+
 def call_chatgpt(messages):
     response = openai.chat.completions.create(
         model="gpt-4o-mini",
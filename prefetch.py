@@ -0,0 +1,82 @@
+import asyncio
+
+
+class TypingPreview:
+    # Typing frames for one speaker. Frames of a prefetched argument are held
+    # back until the speaker's turn comes (release), so clients never read an
+    # argument during the pacing delay. clear() takes a shown preview down
+    # when its argument is thrown away.
+    def __init__(self, send):
+        self.send = send # async fn(text), an empty text clears the preview
+        self.released = False
+        self.shown = False
+        self.text = None
+
+    async def __call__(self, text):
+        self.text = text
+        if self.released:
+            self.shown = True
+            await self.send(text)
+
+    async def release(self):
+        if self.released:
+            return
+        self.released = True
+        if self.text:
+            self.shown = True
+            await self.send(self.text)
+
+    async def clear(self):
+        self.text = None
+        if self.shown:
+            self.shown = False
+            await self.send("")
+
+
+class ArgumentPrefetcher:
+    # Generates an AI speaker's argument in the background as soon as its turn
+    # context is known, so the LLM call overlaps the pacing delay between turns.
+    # A prefetched argument is only used if the prompt it was built from still
+    # matches the current game state, otherwise it is thrown away and regenerated.
+    def __init__(self):
+        self._pending = {} # player name -> (messages, task, on_delta)
+
+    def _discard(self, entry):
+        entry[1].cancel()
+        preview = entry[2]
+        if isinstance(preview, TypingPreview) and preview.shown:
+            asyncio.create_task(preview.clear())
+
+    def prefetch(self, player, game_manager, on_delta=None):
+        messages = player._build_argument_messages(game_manager)
+
+        entry = self._pending.get(player.name)
+        if entry:
+            if entry[0] == messages:
+                return
+            self._discard(entry)
+
+        task = asyncio.create_task(player.generate_argument_async(game_manager, messages, on_delta))
+        self._pending[player.name] = (messages, task, on_delta)
+
+    async def take(self, player, game_manager, on_delta=None):
+        # Called when the speaker's turn comes, from here on frames are shown live
+        messages = player._build_argument_messages(game_manager)
+
+        entry = self._pending.pop(player.name, None)
+        if entry:
+            if entry[0] == messages:
+                if isinstance(entry[2], TypingPreview):
+                    await entry[2].release()
+                return await entry[1]
+            # New discussion messages or deaths since the prefetch started
+            self._discard(entry)
+
+        if isinstance(on_delta, TypingPreview):
+            await on_delta.release()
+        return await player.generate_argument_async(game_manager, messages, on_delta)
+
+    def cancel_all(self):
+        for entry in self._pending.values():
+            self._discard(entry)
+        self._pending.clear()
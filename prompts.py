@@ -36,4 +36,31 @@ ARGUMENT_STYLES = [
     "Be supportive and encouraging. Defend others from accusations.",
     "Be contrarian. Challenge the majority opinion.",
     "Be concise and reserved. Say as little as possible."
-]
\ No newline at end of file
+]
+# Canned arguments used when the LLM is degraded, keep each under 150 characters
+ARGUMENT_TEMPLATES = {
+    "accuse": [
+        "{name} has been acting off this whole time. I think we should look hard at them.",
+        "Something about {name} doesn't add up for me. I'm leaning toward voting them.",
+        "I keep coming back to {name}. Their story feels like it's covering something.",
+        "{name}, you've been careful not to commit to anything. Why is that?"
+    ],
+    "defend": [
+        "I don't think {name} is the problem here. Let's not waste a vote on them.",
+        "{name} has been straightforward so far. I'd look elsewhere.",
+        "I'm fairly comfortable with {name}. The pressure should go somewhere else."
+    ],
+    "investigated_mafia": [
+        "I have good reason to believe {name} is Mafia. Please vote with me on this.",
+        "Trust me on this one, {name} is not on our side."
+    ],
+    "investigated_innocent": [
+        "I'm confident {name} is innocent. Let's not turn on them.",
+        "Whatever else happens, I'd leave {name} alone. I have reason to trust them."
+    ],
+    "neutral": [
+        "I don't have a strong read yet. I want to hear more before I decide.",
+        "Nobody has said anything concrete so far. Who actually has a lead?",
+        "Let's slow down and compare what everyone said last round."
+    ]
+}
@@ -0,0 +1,93 @@
+from collections import deque
+
+HISTORY_TAIL = 9 # Longest chat tail any prompt uses
+
+
+class RoundContext:
+    # Prompt pieces shared by every AI player in a room. They are rebuilt only
+    # when the part of the game state they depend on changes, so building N
+    # players' prompts costs one pass over the game instead of N.
+    def __init__(self, game_manager):
+        self.game = game_manager
+        self._round = None
+        self._history = None
+        self._history_len = 0
+        self._lines = deque(maxlen=HISTORY_TAIL)
+        self._history_strs = {}
+        self._alive_key = None
+        self._deaths_key = None
+        self._night_key = None
+
+    def refresh(self):
+        game = self.game
+
+        if game.round_number != self._round:
+            self._round = game.round_number
+            self._history = None
+
+        history = game.discussion_history.get(game.round_number, [])
+        if history is not self._history or len(history) < self._history_len:
+            # New round or the history list was replaced
+            self._history = history
+            self._history_len = 0
+            self._lines.clear()
+            self._history_strs = {}
+        if len(history) != self._history_len:
+            for s, l in history[self._history_len:]:
+                self._lines.append(f"{s}: {l}")
+            self._history_len = len(history)
+            self._history_strs = {}
+
+        alive_key = game.state.version
+        if alive_key != self._alive_key:
+            self._alive_key = alive_key
+            self._rebuild_alive()
+
+        # Keyed on contents, the lists are cleared and refilled in place
+        deaths_key = (tuple(p.name for p in game.last_deaths), game.last_voted_out)
+        if deaths_key != self._deaths_key:
+            self._deaths_key = deaths_key
+            self.last_killed = ','.join(p.name for p in game.last_deaths) or 'None'
+            voted_out = game.last_voted_out
+            self.voted_out = f" Voted Out:{voted_out.name}({voted_out.role[0]})" if voted_out else " Voted Out:None"
+
+        night_key = (
+            tuple((doctor.name, target.name) for doctor, target in game.last_protected),
+            tuple((investigator.name, name, is_mafia) for investigator, name, is_mafia in game.last_investigated)
+        )
+        if night_key != self._night_key:
+            self._night_key = night_key
+            # Only the first action of each player is shown, matching the original prompts
+            self.protected_by = {}
+            for doctor, target in game.last_protected:
+                self.protected_by.setdefault(doctor.name, target.name)
+            self.investigated_by = {}
+            for investigator, name, is_mafia in game.last_investigated:
+                self.investigated_by.setdefault(investigator.name, (name, is_mafia))
+
+        return self
+
+    def _rebuild_alive(self):
+        self.alive_players = self.game.get_alive_players()
+        self.alive_names = [p.name for p in self.alive_players]
+        self.alive_str = ','.join(self.alive_names)
+        self.mafia_names = [p.name for p in self.alive_players if p.role == 'Mafia']
+        self.mafia_left = len(self.mafia_names)
+        self._alive_except = {}
+        self._mafia_except = {}
+
+    def history_str(self, n):
+        if n not in self._history_strs:
+            lines = list(self._lines)[-n:]
+            self._history_strs[n] = '\n'.join(lines) or "No discussion yet."
+        return self._history_strs[n]
+
+    def alive_except(self, name):
+        if name not in self._alive_except:
+            self._alive_except[name] = ','.join(n for n in self.alive_names if n != name)
+        return self._alive_except[name]
+
+    def mafia_except(self, name):
+        if name not in self._mafia_except:
+            self._mafia_except[name] = ','.join(n for n in self.mafia_names if n != name)
+        return self._mafia_except[name]
@@ -14,7 +14,8 @@ document.addEventListener('DOMContentLoaded', function() {
         timerSeconds: null,
         currentPhase: null,
         currentSubPhase: null,
-        tiedCandidates: []
+        tiedCandidates: [],
+        typingPreview: null
     };
 
     // Header elements
@@ -244,6 +245,19 @@ document.addEventListener('DOMContentLoaded', function() {
         try {
             console.log("Received data:", event.data);
             const gameState = JSON.parse(event.data);
+
+            // Partial AI argument streamed while it is being generated
+            if (gameState.type === 'typing') {
+                // An empty text means the argument was discarded
+                state.typingPreview = gameState.text ? { speaker: gameState.speaker, text: gameState.text } : null;
+                renderTypingPreview();
+                return;
+            }
+
+            // Drop the preview once the speaker has finished their turn
+            if (state.typingPreview && gameState.current_speaker !== state.typingPreview.speaker) {
+                state.typingPreview = null;
+            }
             
             // Check if player is now dead
             if (state.isAlive && gameState.eliminated && gameState.eliminated.includes(state.playerName)) {
@@ -550,6 +564,38 @@ document.addEventListener('DOMContentLoaded', function() {
             // Auto-scroll to bottom
             discussionElements.discussionFeed.scrollTop = discussionElements.discussionFeed.scrollHeight;
         }
+
+        renderTypingPreview();
+    }
+
+    function renderTypingPreview() {
+        if (!discussionElements.discussionFeed) return;
+
+        let previewDiv = document.getElementById('typingPreview');
+        if (!state.typingPreview) {
+            if (previewDiv) previewDiv.remove();
+            return;
+        }
+
+        if (!previewDiv) {
+            previewDiv = document.createElement('div');
+            previewDiv.id = 'typingPreview';
+            previewDiv.className = 'message typing-preview';
+
+            const senderSpan = document.createElement('span');
+            senderSpan.className = 'sender';
+            const contentSpan = document.createElement('span');
+            contentSpan.className = 'content';
+
+            previewDiv.appendChild(senderSpan);
+            previewDiv.appendChild(contentSpan);
+        }
+
+        // Always keep the preview as the last entry in the feed
+        discussionElements.discussionFeed.appendChild(previewDiv);
+        previewDiv.querySelector('.sender').textContent = state.typingPreview.speaker + ':';
+        previewDiv.querySelector('.content').textContent = ' ' + state.typingPreview.text;
+        discussionElements.discussionFeed.scrollTop = discussionElements.discussionFeed.scrollHeight;
     }
     
     function updateEliminatedPlayers(eliminatedPlayers) {
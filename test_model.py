@@ -4,6 +4,7 @@ from ray.tune.registry import register_env
 from ray.rllib.env import ParallelPettingZooEnv
 from train import MafiaEnv
 import torch
+import numpy as np
 
 register_env(
     "mafia",
@@ -38,22 +39,23 @@ def get_policy_id(agent_id):
 
 while not done["__all__"]:
     actions = {}
-    
-    # For each active agent
+
+    # Group active agents by policy so each module runs one forward pass
+    by_policy = {}
     for agent_id in obs.keys():
-        # Get the right policy module
-        policy_id = get_policy_id(agent_id)
+        by_policy.setdefault(get_policy_id(agent_id), []).append(agent_id)
+
+    for policy_id, agent_ids in by_policy.items():
         module = modules[policy_id]
-        
-        # Get action using new API
-        agent_obs = obs[agent_id]
-        tensor_obs = torch.as_tensor(agent_obs, dtype=torch.float32).reshape(1, -1)
+
+        # Get actions using new API
+        tensor_obs = torch.as_tensor(np.stack([obs[a] for a in agent_ids]), dtype=torch.float32)
         output = module.forward_inference({"obs": tensor_obs})
-        
-        # Convert action distribution to discrete action
+
+        # Convert action distributions to discrete actions
         action_dist_inputs = output["action_dist_inputs"]
-        action = torch.argmax(action_dist_inputs, dim=-1).item()
-        actions[agent_id] = action
+        for agent_id, action in zip(agent_ids, torch.argmax(action_dist_inputs, dim=-1).tolist()):
+            actions[agent_id] = action
     
     obs, rewards, terminateds, truncateds, infos = env.step(actions)
     
@@ -0,0 +1,90 @@
+import os
+import json
+import time
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    # tiktoken is optional, fall back to the usual 4 characters per token estimate
+    _encoding = None
+
+SNAPSHOT_PATH = os.getenv("TOKEN_SNAPSHOT_PATH", "token_usage.jsonl")
+SNAPSHOT_INTERVAL = 60 # Seconds between snapshots
+MESSAGE_OVERHEAD = 4 # Tokens the chat format adds around each message
+
+
+def count_tokens(text):
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return max(1, len(text) // 4) if text else 0
+
+def count_message_tokens(messages):
+    return sum(count_tokens(m.get("content", "")) + MESSAGE_OVERHEAD for m in messages)
+
+
+def _empty_usage():
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+def _add_usage(usage, prompt_tokens, completion_tokens):
+    usage["calls"] += 1
+    usage["prompt_tokens"] += prompt_tokens
+    usage["completion_tokens"] += completion_tokens
+
+
+class TokenAggregator:
+    def __init__(self, snapshot_path=SNAPSHOT_PATH, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.totals = _empty_usage()
+        self.estimated_calls = 0 # Calls without a usage field from the API
+        self.by_room = {}
+        self.by_role = {}
+        self.by_call_type = {}
+        self.last_snapshot = time.time()
+
+    def record(self, prompt_tokens, completion_tokens, room_id=None, role=None, call_type=None, estimated=False):
+        _add_usage(self.totals, prompt_tokens, completion_tokens)
+        if estimated:
+            self.estimated_calls += 1
+        for breakdown, key in ((self.by_room, room_id), (self.by_role, role), (self.by_call_type, call_type)):
+            _add_usage(breakdown.setdefault(key or "unknown", _empty_usage()), prompt_tokens, completion_tokens)
+
+        if time.time() - self.last_snapshot >= self.snapshot_interval:
+            self.write_snapshot()
+
+    def record_response(self, messages, response_content, usage=None, **tags):
+        # Prefer the API's own counts, otherwise count locally
+        if usage and "prompt_tokens" in usage:
+            self.record(usage["prompt_tokens"], usage.get("completion_tokens", 0), **tags)
+        else:
+            self.record(count_message_tokens(messages), count_tokens(response_content), estimated=True, **tags)
+
+    def forget_room(self, room_id):
+        # Closed rooms stay in the totals but drop out of the per-room breakdown
+        self.by_room.pop(room_id, None)
+
+    def snapshot(self):
+        return {
+            "time": time.time(),
+            "totals": dict(self.totals),
+            "estimated_calls": self.estimated_calls,
+            "by_room": {k: dict(v) for k, v in self.by_room.items()},
+            "by_role": {k: dict(v) for k, v in self.by_role.items()},
+            "by_call_type": {k: dict(v) for k, v in self.by_call_type.items()}
+        }
+
+    def write_snapshot(self):
+        # One cumulative JSON line per interval, readers only need the last line
+        self.last_snapshot = time.time()
+        with open(self.snapshot_path, "a") as f:
+            f.write(json.dumps(self.snapshot(), separators=(",", ":")) + "\n")
+
+
+_token_aggregator = None
+
+def get_token_aggregator():
+    global _token_aggregator
+    if _token_aggregator is None:
+        _token_aggregator = TokenAggregator()
+    return _token_aggregator
@@ -1,20 +1,41 @@
-def count_tokens_from_log(log_file_path):
-    token_count = 0
-    with open(log_file_path, 'r') as f:
-        for line in f:
-            if "Tokens:" in line:
-                try:
-                    # Extract the number after "Tokens:"
-                    parts = line.split("Tokens:")
-                    if len(parts) > 1:
-                        num = parts[1].strip().split()[0]
-                        token_count += int(num)
-                except ValueError:
-                    continue
-    return token_count
+import os
+import sys
+import json
+
+from token_metrics import SNAPSHOT_PATH
+
+
+def read_last_snapshot(snapshot_path):
+    if not os.path.exists(snapshot_path):
+        return None
+    # Snapshots are cumulative, so only the last line of the file is read
+    with open(snapshot_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b""
+        while pos > 0 and tail.count(b"\n") < 2:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+    lines = tail.strip().splitlines()
+    return json.loads(lines[-1]) if lines else None
+
+def print_usage(name, usage):
+    total = usage['prompt_tokens'] + usage['completion_tokens']
+    print(f"{name}: {total} tokens ({usage['prompt_tokens']} prompt, {usage['completion_tokens']} completion) over {usage['calls']} calls")
 
 if __name__ == "__main__":
-    log_path = "api_calls.log"
-    total_tokens = count_tokens_from_log(log_path)
-    print(f"Total tokens: {total_tokens}")
-    
\ No newline at end of file
+    snapshot_path = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_PATH
+    snapshot = read_last_snapshot(snapshot_path)
+    if snapshot is None:
+        print("No token usage recorded yet")
+        sys.exit(0)
+
+    print_usage("Total", snapshot['totals'])
+    if snapshot['estimated_calls']:
+        print(f"  {snapshot['estimated_calls']} calls were counted locally, the API gave no usage")
+    for section in ['by_call_type', 'by_role', 'by_room']:
+        print(f"\n{section.replace('_', ' ').capitalize()}:")
+        for name, usage in snapshot[section].items():
+            print_usage(f"  {name}", usage)
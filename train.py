@@ -47,10 +47,10 @@ class MafiaEnv(ParallelEnv):
             p = AI_Player(f"player_{i}")
             self.game.add_player(p)
 
-        self.game.players[5].role = "Mafia"
-        self.game.players[6].role = "Mafia"
-        self.game.players[7].role = "Doctor"
-        self.game.players[8].role = "Investigator"
+        self.game.assign_role(self.game.players[5], "Mafia")
+        self.game.assign_role(self.game.players[6], "Mafia")
+        self.game.assign_role(self.game.players[7], "Doctor")
+        self.game.assign_role(self.game.players[8], "Investigator")
         self.phase = "night"
         self.night_actions = {}
         self.active_agents = self.agents.copy()
@@ -113,7 +113,7 @@ class MafiaEnv(ParallelEnv):
         elim = np.random.choice(candidates)
         for player in self.game.players:
             if player.name == elim:
-                player.is_alive = False
+                self.game.eliminate(player)
                 break
         eliminated = player
 
@@ -179,56 +179,23 @@ class MafiaEnv(ParallelEnv):
         # Kill
         for _, target in self.game.last_targeted:
             if not target.is_protected:
-                target.is_alive = False
+                self.game.eliminate(target)
         self.game.last_deaths = [target for _, target in self.game.last_targeted if not target.is_protected]
         # Write death memory
-        for player in self.game.get_alive_players():
-            for death in self.game.last_deaths:
-                player.memory.write(f"{death.name} was killed last night")
+        self.game.publish_events([f"{death.name} was killed last night" for death in self.game.last_deaths])
         # Clear protection
         for player in self.game.players:
             player.is_protected = False
 
     def _create_action_mask(self, player):
-        action_mask = np.zeros(self.num_players, dtype=np.float32)
-        if self.phase == "night":
-            if player.role == "Mafia":
-                for i, p in enumerate(self.game.players):
-                    if p.is_alive and p.role != "Mafia":
-                        action_mask[i] = 1.0
-            elif player.role == "Doctor":
-                for i, p in enumerate(self.game.players):
-                    if p.is_alive and p != player:
-                        action_mask[i] = 1.0
-            elif player.role == "Investigator":
-                valid_targets = [i for i, p in enumerate(self.game.players)
-                                    if p.is_alive and p != player and p not in self.game.already_investigated]
-                if valid_targets:
-                    for i in valid_targets:
-                        action_mask[i] = 1.0
-                else:
-                    # If no targets that haven't been investigated, allow all alive players
-                    for i, p in enumerate(self.game.players):
-                        if p.is_alive and p != player:
-                            action_mask[i] = 1.0
-            else:
-                pass # Villager has no actions at night
-        else:
-            for i, p in enumerate(self.game.players):
-                if p.is_alive and p != player:
-                    action_mask[i] = 1.0
-        
-        return action_mask
+        return self.game.state.action_mask(player.name, player.role, self.phase == "night")
 
     def _build_obs(self):
         obs = {}
-        alive_mask = np.array([1.0 if p.is_alive else 0.0 for p in self.game.players], dtype=np.float32)
+        alive_mask = self.game.state.alive
         
         for name in self.active_agents:
-            for p in self.game.players:
-                if p.name == name:
-                    player = p
-                    break
+            player = self.game.players[self.game.state.index[name]]
 
             if not player.is_alive:
                 obs[name] = np.zeros(self.obs_dim, dtype=np.float32)
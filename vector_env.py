@@ -0,0 +1,323 @@
+import time
+import numpy as np
+from gymnasium.spaces import Box, Discrete
+from gymnasium.vector import VectorEnv, AutoresetMode
+from gymnasium.vector.utils import batch_space
+from game_state import ROLES, ROLE_INDEX
+from memory import MemoryModel
+
+VILLAGER, MAFIA, DOCTOR, INVESTIGATOR = (ROLE_INDEX[r] for r in ROLES)
+NIGHT_ROLES = (MAFIA, DOCTOR, INVESTIGATOR)
+# Same seats as MafiaEnv, so the policy mapping by player index still holds
+DEFAULT_ROLES = ["Villager"] * 5 + ["Mafia", "Mafia", "Doctor", "Investigator", "Villager"]
+
+WIN_REWARD = 5.0
+ELIMINATION_REWARD = 0.5
+NIGHT_ACTION_REWARD = 0.5
+INVALID_ACTION_PENALTY = 1.0
+
+
+class VectorMafiaEnv(VectorEnv):
+    # Steps num_games games of Mafia at once with struct-of-arrays numpy state,
+    # for rollouts without MafiaEnv's per-player Python objects. Every player
+    # seat is one sub-env, so num_envs is num_games * num_players and seat i
+    # of game g is sub-env g * num_players + i. A seat gets MafiaEnv's
+    # observation, picks one target and gets its own reward. Its episode is
+    # the game: dead seats see zeros, get no reward and have their actions
+    # ignored until the game ends, then every seat terminates together and
+    # is reset on the following step (gymnasium NextStep).
+    #
+    # Seats play different roles, so infos carries each seat's role and
+    # action mask. policy_ids() gives the role names ModelManager.get_actions
+    # takes, which batches the four per-role policies the way train.py maps them.
+    #
+    # Observations and rewards follow the web game the policies are served in,
+    # so they differ from MafiaEnv in a few places: each observation describes
+    # the phase about to be played, investigated players are masked for the
+    # Investigator, and the winner and night-action rewards are applied as
+    # MafiaEnv's reward code intended.
+    metadata = {"autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(self, num_games=64, num_players=10, memory_dim=32, roles=None, shuffle_roles=False, seed=None):
+        self.num_games = num_games
+        self.num_players = num_players
+        self.num_envs = num_games * num_players
+        self.memory_dim = memory_dim
+        self.shuffle_roles = shuffle_roles
+        roles = roles if roles is not None else DEFAULT_ROLES
+        if len(roles) != num_players:
+            raise ValueError(f"Need {num_players} roles, got {len(roles)}")
+        self.base_roles = np.array([ROLE_INDEX[r] for r in roles], dtype=np.int8)
+        self.rng = np.random.default_rng(seed)
+
+        self.obs_dim = num_players + num_players + memory_dim + 4 + 1 + 1 + num_players
+        self.single_observation_space = Box(low=-5.0, high=100.0, shape=(self.obs_dim,), dtype=np.float32)
+        self.single_action_space = Discrete(num_players)
+        self.observation_space = batch_space(self.single_observation_space, self.num_envs)
+        self.action_space = batch_space(self.single_action_space, self.num_envs)
+
+        self._build_event_tables()
+        self._allocate()
+
+    def _build_event_tables(self):
+        # Term counts of every memory event MafiaEnv writes, hashed exactly as
+        # AgentMemory does, so a write is a table lookup instead of tokenizing
+        model = MemoryModel(self.memory_dim)
+        names = [f"player_{i}" for i in range(self.num_players)]
+
+        def table(template):
+            return np.array([[model.term_counts(template.format(a=a, t=t)) for t in names] for a in names])
+
+        self.vote_tf = table("{a} voted {t}")
+        self.protect_tf = table("{a} protected {t}")
+        self.target_tf = table("{a} targeted {t}")
+        self.investigate_tf = np.stack([
+            table("{a} investigated {t}, result: Not Mafia"),
+            table("{a} investigated {t}, result: Mafia")
+        ], axis=2) # (actor, target, is_mafia, dim)
+        self.killed_tf = np.array([model.term_counts(f"{t} was killed last night") for t in names])
+
+    def _allocate(self):
+        B, P, D = self.num_games, self.num_players, self.memory_dim
+        self.alive = np.ones((B, P), dtype=bool)
+        self.roles = np.tile(self.base_roles, (B, 1))
+        self.investigated = np.zeros((B, P), dtype=bool)
+        self.suspicions = np.zeros((B, P, P), dtype=np.float32)
+        self.night = np.ones(B, dtype=bool)
+        self.round_number = np.ones(B, dtype=np.float32)
+        self.needs_reset = np.zeros(B, dtype=bool)
+        # Agent memories: summed term counts per agent, document stats per game
+        self.tf_sum = np.zeros((B, P, D))
+        self.doc_freq = np.zeros((B, D))
+        self.n_docs = np.zeros(B)
+
+    def _reset_games(self, games):
+        self.alive[games] = True
+        if self.shuffle_roles:
+            self.roles[games] = self.rng.permuted(np.tile(self.base_roles, (len(games), 1)), axis=1)
+        else:
+            self.roles[games] = self.base_roles
+        self.investigated[games] = False
+        self.suspicions[games] = 0.0
+        self.night[games] = True
+        self.round_number[games] = 1.0
+        self.needs_reset[games] = False
+        self.tf_sum[games] = 0.0
+        self.doc_freq[games] = 0.0
+        self.n_docs[games] = 0.0
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._reset_games(np.arange(self.num_games))
+        return self._observations(), self._infos()
+
+    def policy_ids(self):
+        # Role name of every seat, in sub-env order
+        return [ROLES[r] for r in self.roles.ravel()]
+
+    def action_masks(self):
+        # (num_games, num_players, num_players), same rules as GameState.action_mask
+        P = self.num_players
+        others = self.alive[:, None, :] & ~np.eye(P, dtype=bool)[None]
+        night = self.night[:, None, None]
+        role = self.roles[:, :, None]
+
+        mafia_mask = others & (self.roles != MAFIA)[:, None, :]
+        unseen = others & ~self.investigated[:, None, :]
+        investigator_mask = np.where(unseen.any(axis=2, keepdims=True), unseen, others)
+
+        night_mask = np.where(role == MAFIA, mafia_mask,
+                     np.where(role == DOCTOR, others,
+                     np.where(role == INVESTIGATOR, investigator_mask, False)))
+        return np.where(night, night_mask, others)
+
+    def _memory(self):
+        idf = np.log((1 + self.n_docs[:, None]) / (1 + self.doc_freq)) + 1
+        tfidf = self.tf_sum * idf[:, None, :]
+        norms = np.linalg.norm(tfidf, axis=2, keepdims=True)
+        return np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0).astype(np.float32)
+
+    def _observations(self):
+        B, P = self.num_games, self.num_players
+        masks = self.action_masks()
+        onehot = np.eye(4, dtype=np.float32)[self.roles]
+        alive = np.broadcast_to(self.alive[:, None, :], (B, P, P)).astype(np.float32)
+        phase = np.broadcast_to(self.night[:, None, None], (B, P, 1)).astype(np.float32)
+        round_number = np.broadcast_to(self.round_number[:, None, None], (B, P, 1))
+
+        obs = np.concatenate([alive, self.suspicions, self._memory(), onehot, phase, round_number, masks.astype(np.float32)], axis=2)
+        # Dead players see zeros, as in MafiaEnv
+        obs *= self.alive[:, :, None]
+        return obs.reshape(self.num_envs, self.obs_dim)
+
+    def _infos(self):
+        P = self.num_players
+        return {
+            "action_mask": self.action_masks().reshape(self.num_envs, P),
+            "roles": self.roles.ravel().copy(),
+            "alive": self.alive.ravel().copy(),
+            "night": np.repeat(self.night, P)
+        }
+
+    def _write(self, games, actors, rows):
+        # One private memory event per (game, actor)
+        np.add.at(self.tf_sum, (games, actors), rows)
+        np.add.at(self.doc_freq, games, rows > 0)
+        np.add.at(self.n_docs, games, 1)
+
+    def _fix_invalid(self, actions, masks, acting):
+        # Invalid targets are replaced with a random valid one, as MafiaEnv does
+        chosen = np.take_along_axis(masks, actions[:, :, None], axis=2)[:, :, 0]
+        invalid = acting & ~chosen & masks.any(axis=2)
+        if invalid.any():
+            scores = self.rng.random(masks.shape) * masks
+            actions = np.where(invalid, scores.argmax(axis=2), actions)
+        return actions, invalid
+
+    def _step_night(self, games, actions, masks, rewards):
+        alive, roles = self.alive[games], self.roles[games]
+        acting = alive & np.isin(roles, NIGHT_ROLES)
+        actions, invalid = self._fix_invalid(actions, masks, acting)
+
+        g, actor = np.nonzero(acting)
+        target = actions[g, actor]
+        role = roles[g, actor]
+        game = games[g]
+
+        doctor = role == DOCTOR
+        protected = np.zeros_like(alive)
+        protected[g[doctor], target[doctor]] = True
+        self._write(game[doctor], actor[doctor], self.protect_tf[actor[doctor], target[doctor]])
+
+        mafia = role == MAFIA
+        # Deaths are announced once per Mafia member who picked the victim, as
+        # last_deaths does in the game
+        deaths = np.zeros(alive.shape)
+        np.add.at(deaths, (g[mafia], target[mafia]), 1)
+        deaths *= ~protected
+        killed = deaths > 0
+        self._write(game[mafia], actor[mafia], self.target_tf[actor[mafia], target[mafia]])
+
+        inv = role == INVESTIGATOR
+        inv_g, inv_actor, inv_target = g[inv], actor[inv], target[inv]
+        is_mafia = roles[inv_g, inv_target] == MAFIA
+        self.suspicions[games[inv_g], inv_actor, inv_target] = np.where(is_mafia, 1.0, -1.0)
+        self.investigated[games[inv_g], inv_target] = True
+        self._write(games[inv_g], inv_actor, self.investigate_tf[inv_actor, inv_target, is_mafia.astype(int)])
+
+        # Kills, then every survivor remembers each death
+        alive &= ~killed
+        self.alive[games] = alive
+        n_alive = alive.sum(axis=1)
+        kill_rows = deaths @ self.killed_tf
+        self.tf_sum[games] += alive[:, :, None] * kill_rows[:, None, :]
+        self.doc_freq[games] += (deaths @ (self.killed_tf > 0)) * n_alive[:, None]
+        self.n_docs[games] += deaths.sum(axis=1) * n_alive
+
+        # Doctors whose patient survived and Investigators who found Mafia
+        bonus = np.zeros(alive.shape)
+        bonus[g[doctor], actor[doctor]] = alive[g[doctor], target[doctor]]
+        bonus[inv_g, inv_actor] = is_mafia
+        rewards[games] = (bonus * NIGHT_ACTION_REWARD - invalid * INVALID_ACTION_PENALTY) * alive
+        self.night[games] = False
+
+    def _step_day(self, games, actions, masks, rewards):
+        alive, roles = self.alive[games], self.roles[games]
+        actions, _ = self._fix_invalid(actions, masks, alive)
+
+        g, voter = np.nonzero(alive)
+        target = actions[g, voter]
+        self._write(games[g], voter, self.vote_tf[voter, target])
+
+        counts = np.zeros(alive.shape)
+        np.add.at(counts, (g, target), 1)
+        # Random pick among the most voted
+        top = counts == counts.max(axis=1, keepdims=True)
+        eliminated = (self.rng.random(counts.shape) * top).argmax(axis=1)
+
+        rows = np.arange(len(games))
+        alive[rows, eliminated] = False
+        self.alive[games] = alive
+
+        was_mafia = roles[rows, eliminated] == MAFIA
+        same_side = (roles == MAFIA) == was_mafia[:, None]
+        rewards[games] = np.where(same_side, -ELIMINATION_REWARD, ELIMINATION_REWARD) * alive
+        self.night[games] = True
+        self.round_number[games] += 1
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_games, self.num_players)
+        rewards = np.zeros((self.num_games, self.num_players), dtype=np.float32)
+
+        finished = np.nonzero(self.needs_reset)[0]
+        if len(finished):
+            self._reset_games(finished)
+        playing = ~np.isin(np.arange(self.num_games), finished)
+
+        masks = self.action_masks()
+        night_games = np.nonzero(playing & self.night)[0]
+        day_games = np.nonzero(playing & ~self.night)[0]
+        if len(night_games):
+            self._step_night(night_games, actions[night_games], masks[night_games], rewards)
+        if len(day_games):
+            self._step_day(day_games, actions[day_games], masks[day_games], rewards)
+
+        # Win check for every game that was played this step
+        mafia_left = (self.alive & (self.roles == MAFIA)).sum(axis=1)
+        others_left = self.alive.sum(axis=1) - mafia_left
+        over = playing & ((mafia_left == 0) | (mafia_left >= others_left))
+        mafia_won = mafia_left > 0
+        win = np.where((self.roles == MAFIA) == mafia_won[:, None], WIN_REWARD, -WIN_REWARD) * self.alive
+        rewards = np.where(over[:, None], win, rewards).astype(np.float32)
+
+        # Seats terminate with their game, a dead seat just idles until then
+        terminations = np.repeat(over, self.num_players)
+        truncations = np.zeros_like(terminations)
+        self.needs_reset = over
+
+        infos = self._infos()
+        infos["mafia_won"] = np.repeat(over & mafia_won, self.num_players)
+        return self._observations(), rewards.ravel(), terminations, truncations, infos
+
+
+if __name__ == "__main__":
+    # Checks the env against a standard gymnasium vector wrapper, then
+    # compares random-policy throughput with the single-game MafiaEnv
+    import contextlib
+    import io
+    from gymnasium.wrappers.vector import RecordEpisodeStatistics
+
+    env = RecordEpisodeStatistics(VectorMafiaEnv(num_games=32, seed=0))
+    env.reset(seed=0)
+    episodes = 0
+    for _ in range(100):
+        _, rewards, terminations, _, infos = env.step(env.action_space.sample())
+        assert rewards.shape == terminations.shape == (env.num_envs,)
+        if "episode" in infos:
+            episodes += infos["_episode"].sum()
+    assert episodes > 0
+    print(f"RecordEpisodeStatistics: {episodes} seat episodes, mean return {np.mean(env.return_queue):.2f}")
+
+    for num_games in (1, 64, 512):
+        env = VectorMafiaEnv(num_games=num_games, seed=0)
+        env.reset()
+        steps = 200
+        start = time.perf_counter()
+        for _ in range(steps):
+            env.step(env.rng.integers(0, env.num_players, size=env.num_envs))
+        elapsed = time.perf_counter() - start
+        print(f"VectorMafiaEnv x{num_games}: {steps * num_games / elapsed:,.0f} game steps/s")
+
+    from train import MafiaEnv
+    env = MafiaEnv()
+    steps = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        while steps < 200:
+            obs, _ = env.reset()
+            done = {"__all__": False}
+            while not done["__all__"]:
+                obs, _, done, _, _ = env.step({a: np.random.randint(env.num_players) for a in obs})
+                steps += 1
+    print(f"MafiaEnv: {steps / (time.perf_counter() - start):,.0f} game steps/s")
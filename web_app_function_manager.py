@@ -30,7 +30,7 @@ class WebAppFunctionManager:
         if investigator and investigator.role == "Investigator" and target:
             is_mafia = target.role == "Mafia"
             self.game.last_investigated.append((investigator, target.name, is_mafia))
-            self.game.already_investigated.add(target)
+            self.game.mark_investigated(target)
             return True, is_mafia
         return False, False
 
@@ -50,9 +50,23 @@ class WebAppFunctionManager:
             self.game.votes = {}
         
         self.game.votes[voter.name] = target_name
+        self.game.vote_history.append((self.game.round_number, voter.name, target_name))
         return True
 
-    def try_advance(self):
+    def pending_ai_players(self):
+        # AI players try_advance still has to act for in the current phase
+        if self.get_game_phase() == "night":
+            acted = {p.name for p, _ in self.game.last_protected} | {p.name for p, _ in self.game.last_targeted} | {p.name for p, _, _ in self.game.last_investigated}
+            return [p for p in self.night_action_players() if isinstance(p, AI_Player) and p.name not in acted]
+        if getattr(self.game, 'sub_phase', None) in ["voting", "revote_voting"]:
+            votes = getattr(self.game, 'votes', {})
+            return [p for p in self.game.get_alive_players() if isinstance(p, AI_Player) and p.name not in votes]
+        return []
+
+    def try_advance(self, model_actions=None):
+        # model_actions may be computed beforehand, e.g. off the event loop
+        if model_actions is None:
+            model_actions = self.game.get_model_actions(self.pending_ai_players())
         current_phase = self.get_game_phase()
         
         if current_phase == "night":
@@ -74,18 +88,18 @@ class WebAppFunctionManager:
                 if ai_player.role == "Mafia":
                     valid_targets = [p for p in valid_targets if p.role != "Mafia" and p not in self.game.last_targeted]
                     if valid_targets:
-                        target = ai_player.vote(self.game, valid_targets)
+                        target = ai_player.vote(self.game, valid_targets, model_actions.get(ai_player.name))
                         if target:
                             # print(f"[DEBUG] AI {ai_player.name} (Mafia) targeting {target.name}")
                             self.mafia_action(ai_player.name, target.name)
                             self.game.last_targeted.append((ai_player, target))
                 elif ai_player.role == "Doctor" and valid_targets:
-                    target = ai_player.vote(self.game, valid_targets)
+                    target = ai_player.vote(self.game, valid_targets, model_actions.get(ai_player.name))
                     if target:
                         # print(f"[DEBUG] AI {ai_player.name} (Doctor) protecting {target.name}")
                         self.doctor_action(ai_player.name, target.name)
                 elif ai_player.role == "Investigator" and valid_targets:
-                    target = ai_player.vote(self.game, valid_targets)
+                    target = ai_player.vote(self.game, valid_targets, model_actions.get(ai_player.name))
                     if target:
                         # print(f"[DEBUG] AI {ai_player.name} (Investigator) investigating {target.name}")
                         self.investigator_action(ai_player.name, target.name)
@@ -140,7 +154,7 @@ class WebAppFunctionManager:
                             valid_targets = [p for p in valid_targets if p.name in self.game.tied_candidates]
                         
                         if valid_targets:
-                            target = ai_player.vote(self.game, valid_targets)
+                            target = ai_player.vote(self.game, valid_targets, model_actions.get(ai_player.name))
                             if target:
                                 self.vote_action(ai_player.name, target.name)
                                 votes_count += 1
@@ -166,7 +180,7 @@ class WebAppFunctionManager:
         # Process mafia kills
         for _, target in self.game.last_targeted:
             if target not in protected_players:
-                target.is_alive = False
+                self.game.eliminate(target)
                 self.game.last_deaths.append(target)
 
         # Reset protections
@@ -199,7 +213,7 @@ class WebAppFunctionManager:
             eliminated_name = most_voted[0]
             eliminated = next((p for p in self.game.players if p.name == eliminated_name), None)
             if eliminated:
-                eliminated.is_alive = False
+                self.game.eliminate(eliminated)
                 self.game.last_voted_out = eliminated
                 
                 # Add system message about elimination
@@ -294,8 +308,16 @@ class WebAppFunctionManager:
         
         return False
     
-    def process_ai_night_actions(self):
+    def night_action_players(self):
+        # Villagers have no night action, only the other roles need the policy
+        return [p for p in self.game.get_alive_players() if p.role in ("Mafia", "Doctor", "Investigator")]
+
+    def process_ai_night_actions(self, model_actions=None):
+        # model_actions may be computed beforehand, e.g. off the event loop
         ai_actions_taken = False
+
+        if model_actions is None:
+            model_actions = self.game.get_model_actions(self.night_action_players())
         
         for player in self.game.get_alive_players():
             if not isinstance(player, AI_Player):
@@ -306,13 +328,13 @@ class WebAppFunctionManager:
             if player.role == "Mafia":
                 valid_targets = [p for p in valid_targets if p.role != "Mafia" and p not in self.game.last_targeted]
                 if valid_targets:
-                    target = player.vote(self.game, valid_targets)
+                    target = player.vote(self.game, valid_targets, model_actions.get(player.name))
                     if target:
                         self.mafia_action(player.name, target.name)
                         ai_actions_taken = True
             elif player.role == "Doctor":
                 if valid_targets:
-                    target = player.vote(self.game, valid_targets)
+                    target = player.vote(self.game, valid_targets, model_actions.get(player.name))
                     if target:
                         self.doctor_action(player.name, target.name)
                         ai_actions_taken = True        
@@ -324,7 +346,7 @@ class WebAppFunctionManager:
                         valid_targets = uninvestigated
                         
                 if valid_targets:
-                    target = player.vote(self.game, valid_targets)
+                    target = player.vote(self.game, valid_targets, model_actions.get(player.name))
                     if target:
                         success, is_mafia = self.investigator_action(player.name, target.name)
                         if success: